@@ -31,6 +31,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework',
+    'rest_framework.authtoken',
     'corsheaders',
     'equipment',
 ]
@@ -78,6 +79,42 @@ DATABASES = {
 }
 
 
+# Caches
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # API token lookups. Local memory is per process, so a deleted token or
+    # deactivated user is only evicted in the process that made the change;
+    # the others keep accepting it until EQUIPMENT_TOKEN_CACHE_TIMEOUT runs
+    # out. Point this at a shared backend (e.g. Redis or Memcached) when
+    # running several server processes to make revocation immediate.
+    'auth': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'equipment-auth',
+    },
+    # Serialized history and upload summaries. Local memory is per process;
+    # point this at a shared backend when running several server processes
+    # so invalidation reaches all of them.
+    'responses': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'equipment-responses',
+    },
+    # Rendered PDF reports; shared by all server processes. Entries never
+    # expire (uploads are immutable) and the oldest are culled past MAX_ENTRIES.
+    'reports': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'data' / 'cache' / 'reports',
+        'TIMEOUT': None,
+        'OPTIONS': {
+            'MAX_ENTRIES': 200,
+        },
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -121,9 +158,18 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Uploaded files are hashed as they stream in (for upload deduplication)
+FILE_UPLOAD_HANDLERS = [
+    'equipment.uploadhandlers.ContentHashUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
+        # Preferred: tokens from /api/auth/token/, checked without hashing
+        'equipment.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.BasicAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
@@ -132,6 +178,72 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Cache alias and lifetime (seconds) of API token lookups. With a per-process
+# cache the lifetime bounds how long a revoked token keeps working elsewhere.
+EQUIPMENT_AUTH_CACHE = 'auth'
+EQUIPMENT_TOKEN_CACHE_TIMEOUT = 30
+
+# CSV ingestion settings
+# Uploads larger than the threshold (in bytes) are read in chunks of
+# EQUIPMENT_CSV_CHUNK_SIZE rows; clients can force either mode with ?stream=.
+EQUIPMENT_STREAMING_THRESHOLD = 50 * 1024 * 1024
+EQUIPMENT_CSV_CHUNK_SIZE = 100_000
+
+# Mergeable sketches built at ingestion (see equipment/sketches.py). Bin
+# widths must stay fixed for histograms of different uploads to merge.
+EQUIPMENT_HISTOGRAM_BIN_WIDTHS = {'Flowrate': 5.0, 'Pressure': 0.25, 'Temperature': 2.0}
+EQUIPMENT_SKETCH_COMPRESSION = 200
+
+# Rows are also copied into EquipmentRecord for SQL queries, in batches of
+EQUIPMENT_RECORD_BATCH_SIZE = 5000
+
+# Per-upload columnar row stores (kept outside MEDIA_ROOT so they are never
+# served without authentication)
+EQUIPMENT_DATA_ROOT = BASE_DIR / 'data' / 'datasets'
+
+# Background upload processing (?async=1). Jobs run on an in-process thread
+# pool, so no external broker is needed; files wait in the spool directory
+# until a worker picks them up.
+EQUIPMENT_JOB_WORKERS = 2
+EQUIPMENT_JOB_SPOOL_DIR = BASE_DIR / 'data' / 'spool'
+
+# Re-uploads of a file whose contents match a retained upload reuse its
+# statistics and stored rows instead of parsing the CSV again
+EQUIPMENT_DEDUPLICATE_UPLOADS = True
+
+# Which uploads to keep (see equipment/retention.py); None disables a policy.
+# Pruning runs on the job pool after each upload unless
+# EQUIPMENT_PRUNE_IN_BACKGROUND is False.
+EQUIPMENT_RETENTION = {
+    'KEEP_LATEST': 5,
+    'MAX_AGE_DAYS': None,
+    'MAX_BYTES': None,
+}
+EQUIPMENT_PRUNE_IN_BACKGROUND = True
+
+# Cache alias and safety-net timeout (seconds) for serialized read responses;
+# entries are invalidated whenever an upload is created or deleted
+EQUIPMENT_RESPONSE_CACHE = 'responses'
+EQUIPMENT_RESPONSE_CACHE_TIMEOUT = 300
+
+# PDF reports are cached in this cache alias and rendered in the background
+# as soon as an upload completes
+EQUIPMENT_REPORT_CACHE = 'reports'
+EQUIPMENT_PRERENDER_REPORTS = True
+# Batch reports render per-upload PDFs on a process pool
+EQUIPMENT_REPORT_WORKERS = 2
+EQUIPMENT_BATCH_REPORT_MAX_UPLOADS = 50
+
+# Rows per chunk when raw_data is streamed in upload responses
+EQUIPMENT_STREAM_CHUNK_ROWS = 10000
+
+# Page sizes for /api/uploads/<id>/rows/
+EQUIPMENT_ROWS_PAGE_SIZE = 1000
+EQUIPMENT_ROWS_MAX_PAGE_SIZE = 10000
+# Columnar formats (?format=columnar / ?format=arrow) are cheap to encode,
+# so they may request much larger pages
+EQUIPMENT_ROWS_MAX_COLUMNAR_PAGE_SIZE = 250000
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import EquipmentUpload
+from .models import EquipmentRecord, EquipmentUpload, TrendRollup, UploadJob
+from .retention import delete_uploads
 
 
 @admin.register(EquipmentUpload)
@@ -7,3 +8,30 @@ class EquipmentUploadAdmin(admin.ModelAdmin):
     list_display = ['filename', 'upload_timestamp', 'total_records', 'avg_flowrate', 'avg_pressure', 'avg_temperature']
     list_filter = ['upload_timestamp']
     readonly_fields = ['upload_timestamp']
+    
+    # Route deletes through retention so stored rows and cached reports go too
+    def delete_model(self, request, obj):
+        delete_uploads([obj.id])
+    
+    def delete_queryset(self, request, queryset):
+        delete_uploads(queryset.values_list('id', flat=True))
+
+
+@admin.register(EquipmentRecord)
+class EquipmentRecordAdmin(admin.ModelAdmin):
+    list_display = ['equipment_name', 'equipment_type', 'flowrate', 'pressure', 'temperature', 'upload']
+    list_filter = ['equipment_type']
+    list_select_related = ['upload']
+
+
+@admin.register(TrendRollup)
+class TrendRollupAdmin(admin.ModelAdmin):
+    list_display = ['day', 'equipment_type', 'upload_count', 'record_count']
+    list_filter = ['equipment_type']
+
+
+@admin.register(UploadJob)
+class UploadJobAdmin(admin.ModelAdmin):
+    list_display = ['filename', 'status', 'progress', 'created_at', 'updated_at']
+    list_filter = ['status']
+    readonly_fields = ['created_at', 'updated_at']
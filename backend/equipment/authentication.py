@@ -0,0 +1,41 @@
+"""API token authentication backed by the cache.
+
+DRF's ``TokenAuthentication`` costs one database query per request, and the
+Basic authentication it replaces ran a full password hash per request. Here
+the token -> user lookup is cached for ``EQUIPMENT_TOKEN_CACHE_TIMEOUT``
+seconds. Deleting a token or saving its user evicts the entry from the
+``EQUIPMENT_AUTH_CACHE`` cache (see ``signals.py``). That reaches every
+server process only if the cache is shared; with the default per-process
+cache, other processes keep accepting a revoked token until their entry
+expires.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+
+def token_cache():
+    return caches[settings.EQUIPMENT_AUTH_CACHE]
+
+
+def token_cache_key(key):
+    # Keep raw tokens out of cache keys
+    return 'auth-token:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """``Authorization: Token <key>`` with cached lookups."""
+
+    def authenticate_credentials(self, key):
+        cache_key = token_cache_key(key)
+        credentials = token_cache().get(cache_key)
+        if credentials is None:
+            credentials = super().authenticate_credentials(key)
+            token_cache().set(cache_key, credentials, settings.EQUIPMENT_TOKEN_CACHE_TIMEOUT)
+        user, token = credentials
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        return user, token
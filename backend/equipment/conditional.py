@@ -0,0 +1,84 @@
+"""Validators for conditional GETs (ETag / Last-Modified).
+
+The functions are passed to ``django.views.decorators.http.condition``
+beneath ``@api_view``, so authentication and content negotiation have
+already run when they are called. Uploads never change once created, so an
+upload's id and timestamp identify everything derived from it. Each function
+returns None when there is nothing to validate, letting the view produce its
+usual response (such as a 404).
+"""
+import hashlib
+
+from .models import EquipmentUpload
+from .reports import REPORT_TEMPLATE_VERSION
+from .responsecache import cached_response
+
+
+HISTORY_LENGTH = 5
+
+
+def recent_uploads():
+    """The uploads listed by the history endpoint."""
+    return EquipmentUpload.objects.order_by('-upload_timestamp')[:HISTORY_LENGTH]
+
+
+def make_etag(*parts):
+    return hashlib.sha256(':'.join(str(part) for part in parts).encode()).hexdigest()[:32]
+
+
+def history_versions():
+    # Polled constantly, so kept in the response cache alongside the history
+    return cached_response('history:versions', lambda: list(
+        recent_uploads().values_list('id', 'upload_timestamp')
+    ))
+
+
+def history_etag(request):
+    return make_etag('history', *(f'{upload_id}@{timestamp.isoformat()}'
+                                  for upload_id, timestamp in history_versions()))
+
+
+def history_last_modified(request):
+    versions = history_versions()
+    return versions[0][1] if versions else None
+
+
+def _upload_version(upload_id):
+    return EquipmentUpload.objects.filter(id=upload_id).values_list('id', 'upload_timestamp').first()
+
+
+def upload_etag(request, upload_id):
+    version = _upload_version(upload_id)
+    if version is None:
+        return None
+    # One upload has many representations: projections, pages and formats
+    return make_etag('upload', version[0], version[1].isoformat(),
+                     request.accepted_renderer.format, request.GET.urlencode())
+
+
+def upload_last_modified(request, upload_id):
+    version = _upload_version(upload_id)
+    return version[1] if version else None
+
+
+def _report_version(request):
+    uploads = EquipmentUpload.objects.order_by('-upload_timestamp')
+    upload_id = request.GET.get('id')
+    if upload_id:
+        try:
+            uploads = uploads.filter(id=int(upload_id))
+        except ValueError:
+            return None
+    return uploads.values_list('id', 'upload_timestamp').first()
+
+
+def report_etag(request):
+    version = _report_version(request)
+    if version is None:
+        return None
+    return make_etag('report', version[0], version[1].isoformat(), REPORT_TEMPLATE_VERSION)
+
+
+def report_last_modified(request):
+    version = _report_version(request)
+    return version[1] if version else None
@@ -0,0 +1,282 @@
+import hashlib
+import math
+import os
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db import transaction
+
+from .models import EquipmentUpload
+from .records import copy_records, save_records
+from .sketches import ParameterSketches, TDigest
+from .stats import NUMERIC_COLUMNS, RunningMoments, compute_parameter_stats
+from .storage import ColumnStore, ColumnStoreWriter, dataset_exists, dataset_lock, dataset_size
+from .trends import record_upload_trends
+
+
+REQUIRED_COLUMNS = ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']
+
+
+class InvalidCSV(Exception):
+    """Raised when an uploaded CSV fails validation."""
+
+
+def validate_csv(df):
+    """Validate that CSV has required columns."""
+    missing_columns = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing_columns:
+        return False, f"Missing required columns: {', '.join(missing_columns)}"
+    return True, None
+
+
+def process_csv_data(df):
+    """Process CSV data and calculate statistics."""
+    # Calculate averages
+    avg_flowrate = df['Flowrate'].mean()
+    avg_pressure = df['Pressure'].mean()
+    avg_temperature = df['Temperature'].mean()
+    
+    # Calculate equipment type distribution
+    equipment_type_dist = df['Type'].value_counts().to_dict()
+    
+    return {
+        'avg_flowrate': round(avg_flowrate, 2),
+        'avg_pressure': round(avg_pressure, 2),
+        'avg_temperature': round(avg_temperature, 2),
+        'equipment_type_distribution': equipment_type_dist,
+        'total_records': len(df),
+        'sketches': ParameterSketches().update(df).to_dict()
+    }
+
+
+class StatsAccumulator:
+    """Online accumulator for the upload summary statistics.
+
+    Chunks are folded in one at a time so only running sums, counts, the
+    ``Type`` tallies, the parameter sketches and, overall and per type, the
+    running moments are kept in memory. ``result()`` returns the same shape
+    as ``process_csv_data`` plus ``parameter_stats``, whose medians and 95th
+    percentiles come from t-digests (one per type and column) rather than
+    from re-reading the rows, so they are flagged ``approximate``.
+    """
+
+    def __init__(self):
+        self.total_records = 0
+        self.sums = {col: 0.0 for col in NUMERIC_COLUMNS}
+        self.counts = {col: 0 for col in NUMERIC_COLUMNS}
+        # Counter keeps first-seen order, which value_counts uses to break ties
+        self.type_counts = Counter()
+        self.sketches = ParameterSketches()
+        self.moments = RunningMoments()
+        self.type_moments = {}
+        self.type_digests = {}
+
+    def update(self, chunk):
+        self.total_records += len(chunk)
+        for col in NUMERIC_COLUMNS:
+            values = chunk[col]
+            self.sums[col] += float(values.sum())
+            self.counts[col] += int(values.count())
+        self.type_counts.update(chunk['Type'].value_counts(sort=False).to_dict())
+        self.sketches.update(chunk)
+
+        numeric = chunk[NUMERIC_COLUMNS].apply(pd.to_numeric, errors='coerce')
+        self.moments.update(numeric)
+        for eq_type, group in numeric.groupby(chunk['Type'], sort=False, observed=True):
+            eq_type = str(eq_type)
+            if eq_type not in self.type_moments:
+                self.type_moments[eq_type] = RunningMoments()
+                self.type_digests[eq_type] = [
+                    TDigest(settings.EQUIPMENT_SKETCH_COMPRESSION) for _ in NUMERIC_COLUMNS
+                ]
+            self.type_moments[eq_type].update(group)
+            for digest, col in zip(self.type_digests[eq_type], NUMERIC_COLUMNS):
+                values = group[col].to_numpy(dtype=float)
+                digest.update(values[np.isfinite(values)])
+
+    def mean(self, col):
+        if not self.counts[col]:
+            return math.nan
+        return self.sums[col] / self.counts[col]
+
+    def result(self):
+        # sorted() is stable, so equal counts stay in first-seen order
+        distribution = dict(sorted(self.type_counts.items(), key=lambda item: -item[1]))
+        return {
+            'avg_flowrate': round(self.mean('Flowrate'), 2),
+            'avg_pressure': round(self.mean('Pressure'), 2),
+            'avg_temperature': round(self.mean('Temperature'), 2),
+            'equipment_type_distribution': distribution,
+            'total_records': self.total_records,
+            'sketches': self.sketches.to_dict(),
+            'parameter_stats': self.parameter_stats()
+        }
+
+    def parameter_stats(self):
+        overall = [self.sketches.sketches[col]['digest'] for col in NUMERIC_COLUMNS]
+        result = {
+            'approximate': True,
+            'overall': self.moments.summary(*self._quantiles(overall)),
+            'by_type': {},
+        }
+        for eq_type, moments in self.type_moments.items():
+            result['by_type'][eq_type] = moments.summary(*self._quantiles(self.type_digests[eq_type]))
+        return result
+
+    @staticmethod
+    def _quantiles(digests):
+        """Medians and 95th percentiles of one digest per numeric column."""
+        estimates = [digest.quantile([0.5, 0.95]) for digest in digests]
+        return [value[0] for value in estimates], [value[1] for value in estimates]
+
+
+def iter_csv_chunks(file, chunksize):
+    """Yield DataFrame chunks of at most ``chunksize`` rows from a CSV file."""
+    file.seek(0)
+    with pd.read_csv(file, chunksize=chunksize) as reader:
+        for chunk in reader:
+            yield chunk
+
+
+def ingest_csv_stream(file, chunksize, validate, writer=None, progress=None):
+    """Compute upload statistics from a CSV without loading it whole.
+
+    ``validate`` is called with the first chunk and must return the same
+    ``(is_valid, error_message)`` pair as ``validate_csv``. When a
+    ``storage.ColumnStoreWriter`` is given every chunk is also appended to it.
+    ``progress``, if given, is called with the fraction of bytes consumed
+    after each chunk. Returns ``(stats, error_message)``; ``stats`` is None
+    when validation failed.
+    """
+    size = file.seek(0, os.SEEK_END)
+    accumulator = StatsAccumulator()
+    for index, chunk in enumerate(iter_csv_chunks(file, chunksize)):
+        if index == 0:
+            is_valid, error_message = validate(chunk)
+            if not is_valid:
+                return None, error_message
+        accumulator.update(chunk)
+        if writer is not None:
+            writer.append(chunk)
+        if progress is not None and size:
+            progress(min(file.tell() / size, 1.0))
+    return accumulator.result(), None
+
+
+def file_digest(file):
+    """SHA-256 hex digest of an uploaded file, read chunk by chunk.
+    
+    The file is rewound afterwards so it can be parsed next.
+    """
+    hasher = hashlib.sha256()
+    file.seek(0)
+    for chunk in iter(lambda: file.read(1024 * 1024), b''):
+        hasher.update(chunk)
+    file.seek(0)
+    return hasher.hexdigest()
+
+
+def find_cached_upload(content_hash):
+    """Return the latest retained upload with these contents, if its rows still exist.
+
+    The retained uploads double as the deduplication cache: entries are
+    evicted by the same retention that prunes history, and a hit records a
+    fresh upload, so recently repeated files are the ones that stay cached.
+    """
+    if not content_hash or not settings.EQUIPMENT_DEDUPLICATE_UPLOADS:
+        return None
+    upload = (EquipmentUpload.objects.filter(content_hash=content_hash)
+              .exclude(data_path='').order_by('-upload_timestamp').first())
+    if upload is None or not dataset_exists(upload.data_path):
+        return None
+    return upload
+
+
+def reuse_cached_upload(content_hash, filename):
+    """Record ``filename`` as a copy of a retained upload with the same contents.
+
+    Returns the new upload, or None on a cache miss. Retention cannot remove
+    the shared row store meanwhile: in this process both take
+    ``dataset_lock``, and the source row is locked until the copy commits so
+    that a concurrent delete elsewhere either waits for it, and then sees the
+    store as shared, or wins and leaves nothing to copy.
+    """
+    with dataset_lock, transaction.atomic():
+        cached = find_cached_upload(content_hash)
+        if cached is None:
+            return None
+        cached = EquipmentUpload.objects.select_for_update().filter(pk=cached.pk).first()
+        if cached is None:
+            return None
+        upload = cached.copy_as(filename)
+        copy_records(cached, upload)
+        record_upload_trends(upload)
+    return upload
+
+
+def create_upload(file, filename, streaming, progress=None, content_hash=''):
+    """Parse an uploaded CSV, persist its rows and record the upload.
+
+    Returns ``(upload, df)`` where ``df`` is the parsed DataFrame, or None in
+    streaming mode where the file is never held in memory at once. When a
+    retained upload has the same ``content_hash`` its statistics and stored
+    rows are reused without parsing, and ``df`` is None as well. Raises
+    ``InvalidCSV`` when the file fails validation.
+    """
+    upload = reuse_cached_upload(content_hash, filename)
+    if upload is not None:
+        return upload, None
+    
+    writer = ColumnStoreWriter()
+    df = None
+    try:
+        if streaming:
+            # Chunked read: memory stays flat regardless of file size
+            stats, error_message = ingest_csv_stream(
+                file, settings.EQUIPMENT_CSV_CHUNK_SIZE, validate_csv, writer, progress
+            )
+            if stats is None:
+                raise InvalidCSV(error_message)
+            parameter_stats = stats['parameter_stats']
+        else:
+            # Read CSV file
+            df = pd.read_csv(file)
+            
+            # Validate CSV
+            is_valid, error_message = validate_csv(df)
+            if not is_valid:
+                raise InvalidCSV(error_message)
+            
+            # Process data
+            stats = process_csv_data(df)
+            parameter_stats = compute_parameter_stats(df)
+            writer.append(df)
+        
+        # Persist rows so the upload can be reopened later
+        data_path = writer.close()
+        store = ColumnStore(data_path)
+        
+        # Create EquipmentUpload instance and its per-row records in one go
+        with transaction.atomic():
+            upload = EquipmentUpload.objects.create(
+                filename=filename,
+                avg_flowrate=stats['avg_flowrate'],
+                avg_pressure=stats['avg_pressure'],
+                avg_temperature=stats['avg_temperature'],
+                equipment_type_distribution=stats['equipment_type_distribution'],
+                total_records=stats['total_records'],
+                parameter_stats=parameter_stats,
+                sketches=stats['sketches'],
+                data_path=data_path,
+                data_bytes=dataset_size(data_path),
+                content_hash=content_hash
+            )
+            save_records(upload, store)
+            record_upload_trends(upload)
+    except Exception:
+        writer.abort()
+        raise
+    
+    return upload, df
@@ -0,0 +1,125 @@
+"""Background processing of uploads on a local thread pool.
+
+Job state lives in the ``UploadJob`` table rather than in memory, so any
+server process can report on a job no matter which one runs it. Jobs are
+not resumed if the process running them exits.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .ingest import create_upload
+from .models import EquipmentUpload, UploadJob
+from .reports import get_report_pdf
+from .retention import prune_uploads
+
+
+_executor = None
+_executor_lock = threading.Lock()
+_prune_lock = threading.Lock()
+_prune_queued = False
+
+
+def get_executor():
+    """Return the shared worker pool, creating it on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.EQUIPMENT_JOB_WORKERS,
+                thread_name_prefix='equipment-job',
+            )
+        return _executor
+
+
+def submit_upload_job(file, streaming, content_hash=''):
+    """Spool an uploaded file to disk and queue it for processing.
+
+    The request's temporary file is deleted once the response is sent, so
+    the data is copied before the job is handed to a worker.
+    """
+    job = UploadJob.objects.create(filename=file.name)
+    spool_dir = Path(settings.EQUIPMENT_JOB_SPOOL_DIR)
+    spool_dir.mkdir(parents=True, exist_ok=True)
+    path = spool_dir / f'{job.id}.csv'
+    with open(path, 'wb') as spool:
+        for chunk in file.chunks():
+            spool.write(chunk)
+    get_executor().submit(run_upload_job, job.id, path, streaming, content_hash)
+    return job
+
+
+def update_job(job_id, **fields):
+    # QuerySet.update() skips auto_now, so stamp updated_at explicitly
+    UploadJob.objects.filter(id=job_id).update(updated_at=timezone.now(), **fields)
+
+
+def run_upload_job(job_id, path, streaming, content_hash=''):
+    """Worker entry point: process a spooled file and record the outcome."""
+    try:
+        update_job(job_id, status=UploadJob.STATUS_RUNNING)
+        filename = UploadJob.objects.values_list('filename', flat=True).get(id=job_id)
+        with open(path, 'rb') as file:
+            upload, _ = create_upload(
+                file, filename, streaming,
+                progress=lambda fraction: update_job(job_id, progress=fraction),
+                content_hash=content_hash,
+            )
+        update_job(job_id, status=UploadJob.STATUS_COMPLETED, progress=1.0, upload=upload)
+        schedule_report_prerender(upload.id)
+        schedule_prune()
+    except Exception as e:
+        update_job(job_id, status=UploadJob.STATUS_FAILED, error=str(e))
+    finally:
+        os.remove(path)
+        # Worker threads are not request-bound, so release their connection
+        connection.close()
+
+
+def schedule_report_prerender(upload_id):
+    """Render an upload's PDF report in the background so the first GET is a cache hit."""
+    if settings.EQUIPMENT_PRERENDER_REPORTS:
+        get_executor().submit(prerender_report, upload_id)
+
+
+def prerender_report(upload_id):
+    try:
+        upload = EquipmentUpload.objects.filter(id=upload_id).first()
+        # The upload may already have been pruned
+        if upload is not None:
+            get_report_pdf(upload)
+    finally:
+        connection.close()
+
+
+def schedule_prune():
+    """Apply the retention policies after an upload.
+    
+    Runs on the worker pool unless ``EQUIPMENT_PRUNE_IN_BACKGROUND`` is off.
+    Requests arriving while a prune is already queued share it.
+    """
+    global _prune_queued
+    if not settings.EQUIPMENT_PRUNE_IN_BACKGROUND:
+        prune_uploads()
+        return
+    with _prune_lock:
+        if _prune_queued:
+            return
+        _prune_queued = True
+    get_executor().submit(run_prune)
+
+
+def run_prune():
+    global _prune_queued
+    # Cleared before pruning so uploads made meanwhile queue another pass
+    with _prune_lock:
+        _prune_queued = False
+    try:
+        prune_uploads()
+    finally:
+        connection.close()
@@ -0,0 +1,108 @@
+"""Incrementally encoded, optionally compressed JSON responses.
+
+Row-heavy responses (a summary plus every stored row) are written as the
+summary's fields followed by the rows, ``EQUIPMENT_STREAM_CHUNK_ROWS`` at a
+time, straight from the memory-mapped column store. Neither the row list nor
+the JSON document is ever held whole, and the first bytes leave before the
+last rows are read. Bodies are gzip or brotli compressed as the client's
+``Accept-Encoding`` allows; brotli needs the optional ``brotli`` package.
+"""
+import json
+import zlib
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework.utils.encoders import JSONEncoder
+
+from .storage import column_to_list
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+
+def supported_encodings():
+    """Content codings we can produce, most preferred first."""
+    return (['br'] if brotli is not None else []) + ['gzip']
+
+
+def negotiate_encoding(request):
+    """Pick a content coding from ``Accept-Encoding``, or None for identity."""
+    weights = {}
+    for part in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        coding, _, params = part.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        weight = 1.0
+        params = params.strip().replace(' ', '')
+        if params.startswith('q='):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding] = weight
+
+    best, best_weight = None, 0.0
+    for coding in supported_encodings():
+        weight = weights.get(coding, weights.get('*', 0.0))
+        # Ties go to the earlier, preferred coding
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+def compress_chunks(chunks, coding):
+    if coding == 'br':
+        compressor = brotli.Compressor(quality=5)
+        for chunk in chunks:
+            data = compressor.process(chunk)
+            if data:
+                yield data
+        yield compressor.finish()
+        return
+    # wbits=31 selects the gzip container
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def iter_rows_json(store, columns=None):
+    """Yield a JSON array of ``store``'s rows as objects, one chunk at a time."""
+    columns = columns or store.columns
+    chunk_rows = settings.EQUIPMENT_STREAM_CHUNK_ROWS
+    yield b'['
+    for start in range(0, len(store), chunk_rows):
+        rows = slice(start, start + chunk_rows)
+        values = [column_to_list(store.decode(column, rows)) for column in columns]
+        records = [dict(zip(columns, row)) for row in zip(*values)]
+        encoded = json.dumps(records, separators=(',', ':'))[1:-1]
+        yield (',' if start else '').encode() + encoded.encode()
+    yield b']'
+
+
+def iter_document_json(data, rows_key, store):
+    """Yield ``data`` as a JSON object whose ``rows_key`` holds every row of ``store``."""
+    head = json.dumps(data, cls=JSONEncoder, separators=(',', ':'))
+    # Reopen the encoded object to append the row array as its last member
+    yield (head[:-1] + (',' if data else '') + json.dumps(rows_key) + ':').encode()
+    yield from iter_rows_json(store)
+    yield b'}'
+
+
+def streaming_json_response(request, data, rows_key, store, status=200):
+    """Stream ``data`` plus all rows of ``store`` under ``rows_key``, compressed if accepted."""
+    content = iter_document_json(data, rows_key, store)
+    coding = negotiate_encoding(request)
+    if coding:
+        content = compress_chunks(content, coding)
+    response = StreamingHttpResponse(content, content_type='application/json', status=status)
+    if coding:
+        response['Content-Encoding'] = coding
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 16:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipmentupload',
+            name='data_path',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 17:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0004_equipmentupload_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipmentupload',
+            name='parameter_stats',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 17:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0005_equipmentupload_parameter_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipmentupload',
+            name='sketches',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-18 17:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_records(apps, schema_editor):
+    # Give uploads that already have a row store their records; those whose
+    # store is gone have no rows to copy
+    from equipment.records import save_records
+    from equipment.storage import ColumnStore, dataset_exists
+
+    EquipmentUpload = apps.get_model('equipment', 'EquipmentUpload')
+    for upload in EquipmentUpload.objects.exclude(data_path='').only('id', 'data_path').iterator():
+        if dataset_exists(upload.data_path):
+            save_records(upload, ColumnStore(upload.data_path))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0006_equipmentupload_sketches'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EquipmentRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('row_index', models.IntegerField()),
+                ('equipment_name', models.CharField(blank=True, default='', max_length=255)),
+                ('equipment_type', models.CharField(blank=True, default='', max_length=100)),
+                ('flowrate', models.FloatField(blank=True, null=True)),
+                ('pressure', models.FloatField(blank=True, null=True)),
+                ('temperature', models.FloatField(blank=True, null=True)),
+                ('upload', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='records', to='equipment.equipmentupload')),
+            ],
+            options={
+                'ordering': ['upload', 'row_index'],
+                'indexes': [models.Index(fields=['upload', 'row_index'], name='equipment_e_upload__ba9cd6_idx'), models.Index(fields=['upload', 'equipment_type'], name='equipment_e_upload__38bb71_idx'), models.Index(fields=['equipment_type'], name='equipment_e_equipme_87fd3b_idx'), models.Index(fields=['flowrate'], name='equipment_e_flowrat_26067e_idx'), models.Index(fields=['pressure'], name='equipment_e_pressur_c7f572_idx'), models.Index(fields=['temperature'], name='equipment_e_tempera_fda86f_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_records, migrations.RunPython.noop),
+    ]
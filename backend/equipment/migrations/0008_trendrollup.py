@@ -0,0 +1,56 @@
+# Generated by Django 4.2.7 on 2026-10-18 17:14
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_rollups(apps, schema_editor):
+    # Seed the rollups from retained uploads that already have per-type stats
+    EquipmentUpload = apps.get_model('equipment', 'EquipmentUpload')
+    TrendRollup = apps.get_model('equipment', 'TrendRollup')
+    for upload in EquipmentUpload.objects.all():
+        day = timezone.localdate(upload.upload_timestamp)
+        for eq_type, columns in upload.parameter_stats.get('by_type', {}).items():
+            rollup, _ = TrendRollup.objects.get_or_create(day=day, equipment_type=eq_type)
+            rollup.upload_count += 1
+            rollup.record_count += upload.equipment_type_distribution.get(eq_type, 0)
+            for column in ('flowrate', 'pressure', 'temperature'):
+                stats = columns[column.capitalize()]
+                setattr(rollup, f'{column}_sum',
+                        getattr(rollup, f'{column}_sum') + (stats['mean'] or 0.0) * stats['count'])
+                setattr(rollup, f'{column}_count', getattr(rollup, f'{column}_count') + stats['count'])
+            rollup.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0007_equipmentrecord'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('equipment_type', models.CharField(max_length=100)),
+                ('upload_count', models.IntegerField(default=0)),
+                ('record_count', models.IntegerField(default=0)),
+                ('flowrate_sum', models.FloatField(default=0)),
+                ('flowrate_count', models.IntegerField(default=0)),
+                ('pressure_sum', models.FloatField(default=0)),
+                ('pressure_count', models.IntegerField(default=0)),
+                ('temperature_sum', models.FloatField(default=0)),
+                ('temperature_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['day', 'equipment_type'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='trendrollup',
+            constraint=models.UniqueConstraint(fields=('day', 'equipment_type'), name='unique_trend_rollup'),
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-18 17:16
+
+from pathlib import Path
+
+from django.conf import settings
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def measure_datasets(apps, schema_editor):
+    # Record the on-disk size of existing row stores for the byte budget
+    EquipmentUpload = apps.get_model('equipment', 'EquipmentUpload')
+    for upload in EquipmentUpload.objects.exclude(data_path=''):
+        path = Path(settings.EQUIPMENT_DATA_ROOT) / upload.data_path
+        if path.is_dir():
+            upload.data_bytes = sum(child.stat().st_size for child in path.iterdir())
+            upload.save(update_fields=['data_bytes'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0008_trendrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipmentupload',
+            name='data_bytes',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='equipmentupload',
+            name='upload_timestamp',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(measure_datasets, migrations.RunPython.noop),
+    ]
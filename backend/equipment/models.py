@@ -1,12 +1,19 @@
 from django.db import models
 from django.utils import timezone
 import json
+import uuid
 
 
 class EquipmentUpload(models.Model):
     """Model to store metadata of CSV uploads."""
+    # Fields derived from the file contents; identical files share them
+    SUMMARY_FIELDS = ('avg_flowrate', 'avg_pressure', 'avg_temperature',
+                      'equipment_type_distribution', 'total_records',
+                      'parameter_stats', 'sketches', 'data_path', 'data_bytes',
+                      'content_hash')
+    
     filename = models.CharField(max_length=255)
-    upload_timestamp = models.DateTimeField(default=timezone.now)
+    upload_timestamp = models.DateTimeField(default=timezone.now, db_index=True)
     
     # Summary statistics stored as JSON
     avg_flowrate = models.FloatField()
@@ -19,8 +26,123 @@ class EquipmentUpload(models.Model):
     # Total number of records
     total_records = models.IntegerField()
     
+    # count/mean/min/max/std/median/p95 per parameter, overall and per
+    # equipment type (see stats.py)
+    parameter_stats = models.JSONField(default=dict, blank=True)
+    
+    # Mergeable histogram + t-digest per parameter (see sketches.py)
+    sketches = models.JSONField(default=dict, blank=True)
+    
+    # Directory name of the columnar row store (see storage.py)
+    data_path = models.CharField(max_length=64, blank=True, default='')
+    # Size of that row store on disk, for the retention byte budget
+    data_bytes = models.BigIntegerField(default=0)
+    
+    # SHA-256 of the uploaded bytes, used to skip re-parsing repeated files
+    content_hash = models.CharField(max_length=64, blank=True, default='', db_index=True)
+    
     class Meta:
         ordering = ['-upload_timestamp']
     
     def __str__(self):
         return f"{self.filename} - {self.upload_timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
+    
+    def copy_as(self, filename):
+        """Record a new upload of the same file contents under ``filename``."""
+        summary = {field: getattr(self, field) for field in self.SUMMARY_FIELDS}
+        return EquipmentUpload.objects.create(filename=filename, **summary)
+
+
+class EquipmentRecord(models.Model):
+    """One row of an uploaded CSV, so rows can be queried with SQL."""
+    # CSV column -> model field
+    COLUMN_FIELDS = {
+        'Equipment Name': 'equipment_name',
+        'Type': 'equipment_type',
+        'Flowrate': 'flowrate',
+        'Pressure': 'pressure',
+        'Temperature': 'temperature',
+    }
+    
+    upload = models.ForeignKey(EquipmentUpload, on_delete=models.CASCADE, related_name='records')
+    # Position of the row in the uploaded file
+    row_index = models.IntegerField()
+    
+    equipment_name = models.CharField(max_length=255, blank=True, default='')
+    equipment_type = models.CharField(max_length=100, blank=True, default='')
+    flowrate = models.FloatField(null=True, blank=True)
+    pressure = models.FloatField(null=True, blank=True)
+    temperature = models.FloatField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['upload', 'row_index']
+        indexes = [
+            models.Index(fields=['upload', 'row_index']),
+            models.Index(fields=['upload', 'equipment_type']),
+            models.Index(fields=['equipment_type']),
+            models.Index(fields=['flowrate']),
+            models.Index(fields=['pressure']),
+            models.Index(fields=['temperature']),
+        ]
+    
+    def __str__(self):
+        return f"{self.equipment_name} ({self.equipment_type})"
+
+
+class TrendRollup(models.Model):
+    """Running per-type totals of all uploads made on one day (see trends.py)."""
+    day = models.DateField()
+    equipment_type = models.CharField(max_length=100)
+    upload_count = models.IntegerField(default=0)
+    record_count = models.IntegerField(default=0)
+    
+    # Sums and non-null counts, so averages can be combined across buckets
+    flowrate_sum = models.FloatField(default=0)
+    flowrate_count = models.IntegerField(default=0)
+    pressure_sum = models.FloatField(default=0)
+    pressure_count = models.IntegerField(default=0)
+    temperature_sum = models.FloatField(default=0)
+    temperature_count = models.IntegerField(default=0)
+    
+    class Meta:
+        ordering = ['day', 'equipment_type']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'equipment_type'], name='unique_trend_rollup'),
+        ]
+    
+    def __str__(self):
+        return f"{self.day} - {self.equipment_type}"
+
+
+class UploadJob(models.Model):
+    """Progress of an upload processed by a background worker."""
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    filename = models.CharField(max_length=255)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    
+    # Fraction of the file processed so far, from 0 to 1
+    progress = models.FloatField(default=0)
+    error = models.TextField(blank=True, default='')
+    
+    # Set once processing completes; cleared if the upload is pruned later
+    upload = models.ForeignKey(EquipmentUpload, null=True, blank=True,
+                               on_delete=models.SET_NULL, related_name='jobs')
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.filename} - {self.status}"
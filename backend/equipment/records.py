@@ -0,0 +1,164 @@
+"""Per-row ``EquipmentRecord`` storage and SQL-side queries over it.
+
+Rows are copied from an upload's column store into the database in batches
+of ``EQUIPMENT_RECORD_BATCH_SIZE`` with one parameterized ``INSERT`` run
+through ``executemany``, skipping model instances entirely. An upload that
+reuses another's rows copies its records with a single ``INSERT ... SELECT``.
+The query helpers below turn request parameters into querysets so filtering
+and aggregation run in the database:
+
+* ``upload=1,2`` - restrict to some uploads;
+* ``since`` / ``until`` - upload time range (ISO date or datetime);
+* ``Type=Pump,Valve`` / ``Equipment Name=P-1`` - equality filters;
+* ``Pressure__gte=7`` - range filters (``gt``, ``gte``, ``lt``, ``lte``)
+  on numeric columns.
+"""
+from datetime import datetime
+
+import numpy as np
+from django.conf import settings
+from django.db import connection
+from django.db.models import Avg, Count, Max, Min
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import EquipmentRecord
+from .rows import RANGE_OPERATORS
+from .stats import NUMERIC_COLUMNS
+
+
+RESERVED_PARAMS = ('upload', 'since', 'until', 'offset', 'limit', 'group_by', 'format')
+RECORD_FIELDS = ['upload_id', 'row_index'] + list(EquipmentRecord.COLUMN_FIELDS.values())
+GROUP_FIELDS = {
+    'upload': 'upload_id',
+    'Type': 'equipment_type',
+}
+
+
+def _nullable(values):
+    # NaN becomes NULL in the database
+    return np.where(np.isnan(values), None, values).tolist()
+
+
+def _columns(fields):
+    quote = connection.ops.quote_name
+    return ', '.join(quote(EquipmentRecord._meta.get_field(field).column) for field in fields)
+
+
+def save_records(upload, store):
+    """Insert the rows of ``store`` as records of ``upload``.
+
+    Call inside ``transaction.atomic()`` so the batches commit together.
+    """
+    batch_size = settings.EQUIPMENT_RECORD_BATCH_SIZE
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        connection.ops.quote_name(EquipmentRecord._meta.db_table),
+        _columns(RECORD_FIELDS),
+        ', '.join(['%s'] * len(RECORD_FIELDS)),
+    )
+    with connection.cursor() as cursor:
+        for start in range(0, len(store), batch_size):
+            rows = slice(start, start + batch_size)
+            names = store.decode('Equipment Name', rows).tolist()
+            types = [eq_type or '' for eq_type in store.decode('Type', rows).tolist()]
+            numeric = [_nullable(store.decode(column, rows)) for column in NUMERIC_COLUMNS]
+            indexes = range(start, start + len(names))
+            cursor.executemany(sql, list(zip([upload.id] * len(names), indexes, names, types, *numeric)))
+
+
+def copy_records(source, upload):
+    """Give ``upload`` a copy of the records of ``source`` in one set-based statement.
+
+    Call inside ``transaction.atomic()``.
+    """
+    table = connection.ops.quote_name(EquipmentRecord._meta.db_table)
+    copied = RECORD_FIELDS[1:]
+    sql = 'INSERT INTO {table} ({columns}) SELECT %s, {copied} FROM {table} WHERE {upload} = %s'.format(
+        table=table,
+        columns=_columns(RECORD_FIELDS),
+        copied=_columns(copied),
+        upload=_columns(['upload_id']),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [upload.id, source.id])
+
+
+def _parse_timestamp(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        date = parse_date(value)
+        if date is None:
+            raise ValueError(f"'{name}' must be an ISO date or datetime")
+        parsed = datetime.combine(date, datetime.min.time())
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def filter_records(params):
+    """Build a filtered ``EquipmentRecord`` queryset from request parameters.
+
+    Raises ``ValueError`` for invalid parameters.
+    """
+    records = EquipmentRecord.objects.all()
+    if params.get('upload'):
+        try:
+            upload_ids = [int(value) for value in params['upload'].split(',') if value.strip()]
+        except ValueError:
+            raise ValueError("'upload' must be a comma-separated list of upload ids")
+        records = records.filter(upload_id__in=upload_ids)
+    since = _parse_timestamp(params, 'since')
+    if since:
+        records = records.filter(upload__upload_timestamp__gte=since)
+    until = _parse_timestamp(params, 'until')
+    if until:
+        records = records.filter(upload__upload_timestamp__lt=until)
+
+    for key, value in params.items():
+        if key in RESERVED_PARAMS:
+            continue
+        column, _, op = key.partition('__')
+        if column not in EquipmentRecord.COLUMN_FIELDS:
+            raise ValueError(f"Unknown filter: {key}")
+        field = EquipmentRecord.COLUMN_FIELDS[column]
+        if op:
+            if op not in RANGE_OPERATORS or column not in NUMERIC_COLUMNS:
+                raise ValueError(f"Unsupported filter: {key}")
+            try:
+                bound = float(value)
+            except ValueError:
+                raise ValueError(f"'{key}' must be a number")
+            records = records.filter(**{f'{field}__{op}': bound})
+        elif column in NUMERIC_COLUMNS:
+            try:
+                targets = [float(v) for v in value.split(',')]
+            except ValueError:
+                raise ValueError(f"'{key}' must be a number")
+            records = records.filter(**{f'{field}__in': targets})
+        else:
+            records = records.filter(**{f'{field}__in': value.split(',')})
+    return records
+
+
+def aggregate_records(records, group_by):
+    """Count plus average, minimum and maximum of each numeric field per group.
+
+    ``group_by`` lists keys of ``GROUP_FIELDS``; an empty list aggregates the
+    whole queryset into a single row.
+    """
+    unknown = [key for key in group_by if key not in GROUP_FIELDS]
+    if unknown:
+        raise ValueError(f"Cannot group by: {', '.join(unknown)}")
+    fields = [GROUP_FIELDS[key] for key in group_by]
+    aggregates = {'count': Count('id')}
+    for column in NUMERIC_COLUMNS:
+        field = EquipmentRecord.COLUMN_FIELDS[column]
+        aggregates[f'avg_{field}'] = Avg(field)
+        aggregates[f'min_{field}'] = Min(field)
+        aggregates[f'max_{field}'] = Max(field)
+    if not fields:
+        return [records.aggregate(**aggregates)]
+    return list(records.order_by().values(*fields).annotate(**aggregates).order_by(*fields))
@@ -0,0 +1,73 @@
+"""Column-oriented renderers for row data.
+
+Views using these renderers pass a payload whose ``data`` entry maps each
+column name to a numpy array (see ``views.get_upload_rows``). The remaining
+keys are pagination metadata.
+"""
+import json
+
+from rest_framework.renderers import BaseRenderer, BrowsableAPIRenderer, JSONRenderer
+
+from .storage import COLUMN_ENCODINGS, column_to_list
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - pyarrow is optional
+    pa = None
+
+
+class ColumnarJSONRenderer(JSONRenderer):
+    """JSON with one array per column instead of one object per row."""
+    media_type = 'application/vnd.equipment.columnar+json'
+    format = 'columnar'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict) and 'data' in data:
+            data = dict(data, data={
+                column: column_to_list(values) for column, values in data['data'].items()
+            })
+        return super().render(data, accepted_media_type, renderer_context)
+
+
+class ArrowIPCRenderer(BaseRenderer):
+    """Apache Arrow IPC stream holding a single record batch.
+
+    Pagination metadata travels in the schema metadata under ``equipment``.
+    Payloads without rows, such as authentication or throttling errors, are
+    rendered as plain JSON.
+    """
+    media_type = 'application/vnd.apache.arrow.stream'
+    format = 'arrow'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not isinstance(data, dict) or 'data' not in data:
+            response = (renderer_context or {}).get('response')
+            if response is not None:
+                response['Content-Type'] = JSONRenderer.media_type
+            return JSONRenderer().render(data, accepted_media_type, renderer_context)
+        metadata = {key: value for key, value in data.items() if key != 'data'}
+        arrays = []
+        for column, values in data['data'].items():
+            array = pa.array(values, from_pandas=True)
+            if COLUMN_ENCODINGS.get(column) == 'category':
+                array = array.dictionary_encode()
+            arrays.append(array)
+        batch = pa.record_batch(
+            arrays,
+            names=list(data['data']),
+            metadata={'equipment': json.dumps(metadata)},
+        )
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, batch.schema) as writer:
+            writer.write_batch(batch)
+        return sink.getvalue().to_pybytes()
+
+
+def row_renderer_classes():
+    """Renderers offered for row data; Arrow only when pyarrow is installed."""
+    renderers = [JSONRenderer, BrowsableAPIRenderer, ColumnarJSONRenderer]
+    if pa is not None:
+        renderers.append(ArrowIPCRenderer)
+    return renderers
@@ -0,0 +1,377 @@
+"""Rendering and caching of PDF reports.
+
+An upload never changes after it is created, so its rendered report is
+cached under the upload id, its timestamp and ``REPORT_TEMPLATE_VERSION``.
+Bump the version whenever the layout below changes so stale PDFs are
+ignored.
+
+Layout functions work on plain ``report_context()`` dicts rather than model
+instances so they can run in worker processes for batch reports.
+"""
+import multiprocessing
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import caches
+from pypdf import PdfReader, PdfWriter
+from reportlab.lib.pagesizes import letter
+from reportlab.lib import colors
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from reportlab.lib.styles import getSampleStyleSheet
+
+from .stats import NUMERIC_COLUMNS, STATISTICS
+
+
+REPORT_TEMPLATE_VERSION = 2
+
+GRID_TABLE_STYLE = [
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+]
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into a single execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    runs wait for and share its result (or exception).
+    """
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = func()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+_renders = SingleFlight()
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the shared report process pool, creating it on first use.
+
+    Workers are spawned rather than forked so they never inherit locks held
+    by the server's other threads.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.EQUIPMENT_REPORT_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _pool
+
+
+def report_cache():
+    return caches[settings.EQUIPMENT_REPORT_CACHE]
+
+
+def report_cache_key(upload):
+    # The timestamp guards against ids being reused after a database reset
+    stamp = int(upload.upload_timestamp.timestamp() * 1e6)
+    return f'report:{upload.id}:{stamp}:v{REPORT_TEMPLATE_VERSION}'
+
+
+def delete_cached_reports(uploads):
+    report_cache().delete_many([report_cache_key(upload) for upload in uploads])
+
+
+def get_report_pdf(upload):
+    """Return the PDF bytes for ``upload``, rendering them at most once.
+
+    Concurrent requests in this process for a report that is not cached yet
+    wait for a single render; other processes pick it up from the shared
+    cache once it is stored.
+    """
+    cache = report_cache()
+    key = report_cache_key(upload)
+    pdf_content = cache.get(key)
+    if pdf_content is not None:
+        return pdf_content
+    
+    def render():
+        # Re-check: another caller may have stored it since our lookup
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+        pdf = build_report_pdf(report_context(upload))
+        cache.set(key, pdf)
+        return pdf
+    
+    return _renders.do(key, render)
+
+
+def report_context(upload):
+    """Plain, picklable snapshot of everything a report shows about an upload."""
+    return {
+        'id': upload.id,
+        'filename': upload.filename,
+        'upload_date': upload.upload_timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+        'total_records': upload.total_records,
+        'avg_flowrate': upload.avg_flowrate,
+        'avg_pressure': upload.avg_pressure,
+        'avg_temperature': upload.avg_temperature,
+        'equipment_type_distribution': upload.equipment_type_distribution,
+        'parameter_stats': upload.parameter_stats,
+    }
+
+
+def format_stat(value):
+    return '-' if value is None else f'{value:.2f}'
+
+
+def upload_section(context, styles):
+    """Flowables describing one upload: file info, averages and type counts."""
+    elements = []
+    
+    # File information
+    info_data = [
+        ['Filename:', context['filename']],
+        ['Upload Date:', context['upload_date']],
+        ['Total Records:', str(context['total_records'])],
+    ]
+    info_table = Table(info_data, colWidths=[2*inch, 4*inch])
+    info_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (0, -1), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+        ('BACKGROUND', (1, 0), (1, -1), colors.beige),
+    ]))
+    elements.append(info_table)
+    elements.append(Spacer(1, 0.3*inch))
+    
+    # Summary statistics
+    stats_title = Paragraph("Summary Statistics", styles['Heading2'])
+    elements.append(stats_title)
+    elements.append(Spacer(1, 0.1*inch))
+    
+    stats_data = [
+        ['Parameter', 'Average Value'],
+        ['Flowrate', f"{context['avg_flowrate']}"],
+        ['Pressure', f"{context['avg_pressure']}"],
+        ['Temperature', f"{context['avg_temperature']}"],
+    ]
+    stats_table = Table(stats_data, colWidths=[3*inch, 3*inch])
+    stats_table.setStyle(TableStyle(GRID_TABLE_STYLE))
+    elements.append(stats_table)
+    elements.append(Spacer(1, 0.3*inch))
+    
+    # Equipment type distribution
+    dist_title = Paragraph("Equipment Type Distribution", styles['Heading2'])
+    elements.append(dist_title)
+    elements.append(Spacer(1, 0.1*inch))
+    
+    dist_data = [['Equipment Type', 'Count']]
+    for eq_type, count in context['equipment_type_distribution'].items():
+        dist_data.append([eq_type, str(count)])
+    
+    dist_table = Table(dist_data, colWidths=[3*inch, 3*inch])
+    dist_table.setStyle(TableStyle(GRID_TABLE_STYLE))
+    elements.append(dist_table)
+    
+    # Per-type statistics (uploads made before these were computed have none)
+    by_type = context['parameter_stats'].get('by_type', {})
+    if by_type:
+        elements.append(Spacer(1, 0.3*inch))
+        elements.append(Paragraph("Statistics by Equipment Type", styles['Heading2']))
+        for parameter in NUMERIC_COLUMNS:
+            elements.append(Spacer(1, 0.1*inch))
+            elements.append(Paragraph(parameter, styles['Heading3']))
+            type_data = [['Equipment Type', 'Count', 'Mean', 'Min', 'Max', 'Std', 'Median', 'P95']]
+            for eq_type, columns in by_type.items():
+                values = columns[parameter]
+                type_data.append([eq_type, str(values['count'])] + [
+                    format_stat(values[stat]) for stat in STATISTICS[1:]
+                ])
+            type_table = Table(type_data, colWidths=[1.5*inch] + [0.65*inch] * 7)
+            type_table.setStyle(TableStyle(GRID_TABLE_STYLE))
+            elements.append(type_table)
+    return elements
+
+
+def comparison_section(contexts, styles):
+    """Flowables comparing several uploads side by side, oldest first."""
+    elements = []
+    col_width = 4.5*inch / len(contexts)
+    headers = [f"#{context['id']}\n{context['upload_date'][:10]}" for context in contexts]
+    
+    # Uploaded files
+    files_data = [['Upload', 'Filename', 'Upload Date', 'Records']]
+    for context in contexts:
+        files_data.append([f"#{context['id']}", context['filename'],
+                           context['upload_date'], str(context['total_records'])])
+    files_table = Table(files_data, colWidths=[0.8*inch, 2.6*inch, 1.8*inch, 1*inch])
+    files_table.setStyle(TableStyle(GRID_TABLE_STYLE))
+    elements.append(files_table)
+    elements.append(Spacer(1, 0.3*inch))
+    
+    # Averages side by side
+    elements.append(Paragraph("Average Values", styles['Heading2']))
+    elements.append(Spacer(1, 0.1*inch))
+    averages_data = [['Parameter'] + headers]
+    for label, field in [('Flowrate', 'avg_flowrate'), ('Pressure', 'avg_pressure'),
+                         ('Temperature', 'avg_temperature')]:
+        averages_data.append([label] + [f"{context[field]}" for context in contexts])
+    averages_table = Table(averages_data, colWidths=[1.5*inch] + [col_width] * len(contexts))
+    averages_table.setStyle(TableStyle(GRID_TABLE_STYLE))
+    elements.append(averages_table)
+    elements.append(Spacer(1, 0.3*inch))
+    
+    # Type distribution over time
+    elements.append(Paragraph("Equipment Type Distribution", styles['Heading2']))
+    elements.append(Spacer(1, 0.1*inch))
+    types = []
+    for context in contexts:
+        types += [t for t in context['equipment_type_distribution'] if t not in types]
+    dist_data = [['Equipment Type'] + headers]
+    for eq_type in types:
+        dist_data.append([eq_type] + [str(context['equipment_type_distribution'].get(eq_type, 0))
+                                      for context in contexts])
+    dist_table = Table(dist_data, colWidths=[1.5*inch] + [col_width] * len(contexts))
+    dist_table.setStyle(TableStyle(GRID_TABLE_STYLE))
+    elements.append(dist_table)
+    return elements
+
+
+def build_pdf(elements):
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    doc.build(elements)
+    pdf_content = buffer.getvalue()
+    buffer.close()
+    return pdf_content
+
+
+def build_report_pdf(context):
+    """Render the PDF report for one upload."""
+    styles = getSampleStyleSheet()
+    title = Paragraph("Chemical Equipment Parameter Report", styles['Title'])
+    elements = [title, Spacer(1, 0.2*inch)]
+    elements += upload_section(context, styles)
+    return build_pdf(elements)
+
+
+def build_comparison_pdf(contexts):
+    """Render a report comparing several uploads."""
+    styles = getSampleStyleSheet()
+    title = Paragraph("Chemical Equipment Comparison Report", styles['Title'])
+    elements = [title, Spacer(1, 0.2*inch)]
+    elements += comparison_section(contexts, styles)
+    return build_pdf(elements)
+
+
+def merge_pdfs(documents):
+    """Concatenate PDF documents into one, each starting on a new page."""
+    writer = PdfWriter()
+    for document in documents:
+        writer.append(PdfReader(BytesIO(document)))
+    buffer = BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def get_report_pdfs(uploads):
+    """Return the report PDF of every upload, rendering misses in parallel.
+    
+    reportlab layout is CPU-bound and holds the GIL, so uncached reports are
+    rendered on the process pool rather than on threads.
+    """
+    cache = report_cache()
+    keys = [report_cache_key(upload) for upload in uploads]
+    cached = cache.get_many(keys)
+    missing = [(key, upload) for key, upload in zip(keys, uploads) if key not in cached]
+    if missing:
+        contexts = [report_context(upload) for _, upload in missing]
+        rendered = get_pool().map(build_report_pdf, contexts)
+        for (key, _), pdf in zip(missing, rendered):
+            cache.set(key, pdf)
+            cached[key] = pdf
+    return [cached[key] for key in keys]
+
+
+def get_batch_pdfs(uploads):
+    """Return ``(comparison, reports)`` PDFs for a batch of uploads.
+    
+    The comparison is rendered on the process pool next to the uncached
+    reports instead of in the calling thread.
+    """
+    contexts = [report_context(upload) for upload in uploads]
+    comparison = get_pool().submit(build_comparison_pdf, contexts)
+    reports = get_report_pdfs(uploads)
+    return comparison.result(), reports
+
+
+class _ZipBuffer:
+    """Write-only sink that lets ``zipfile`` stream into a generator."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def iter_zip(files):
+    """Yield a ZIP archive of ``(name, bytes)`` pairs piece by piece."""
+    sink = _ZipBuffer()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in files:
+            archive.writestr(name, content)
+            yield sink.drain()
+    yield sink.drain()
@@ -0,0 +1,67 @@
+"""Cache of serialized read responses (history and upload summaries).
+
+Entries are stored under a generation number kept in the cache itself.
+Creating, changing or deleting an upload bumps the generation once the
+transaction commits (see ``signals.py``), which orphans every entry at once;
+orphans simply expire. Hit and miss counters live in the same cache, so
+they are shared by every process that shares the backend.
+"""
+from django.conf import settings
+from django.core.cache import caches
+
+
+PREFIX = 'responses'
+GENERATION_KEY = f'{PREFIX}:generation'
+COUNTER_KEYS = {
+    'hits': f'{PREFIX}:hits',
+    'misses': f'{PREFIX}:misses',
+}
+
+
+def response_cache():
+    return caches[settings.EQUIPMENT_RESPONSE_CACHE]
+
+
+def _increment(key):
+    cache = response_cache()
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Missing or evicted: start counting again
+        cache.add(key, 0, None)
+        return cache.incr(key)
+
+
+def generation():
+    return response_cache().get_or_set(GENERATION_KEY, 0, None)
+
+
+def invalidate_responses():
+    """Drop every cached response."""
+    _increment(GENERATION_KEY)
+
+
+def cached_response(name, build):
+    """Return the cached data for ``name``, calling ``build()`` on a miss.
+
+    Exceptions from ``build`` propagate and nothing is cached.
+    """
+    cache = response_cache()
+    key = f'{PREFIX}:{generation()}:{name}'
+    data = cache.get(key)
+    if data is not None:
+        _increment(COUNTER_KEYS['hits'])
+        return data
+    _increment(COUNTER_KEYS['misses'])
+    data = build()
+    cache.set(key, data, settings.EQUIPMENT_RESPONSE_CACHE_TIMEOUT)
+    return data
+
+
+def cache_stats():
+    cache = response_cache()
+    stats = {name: cache.get(key, 0) for name, key in COUNTER_KEYS.items()}
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = stats['hits'] / lookups if lookups else None
+    stats['generation'] = generation()
+    return stats
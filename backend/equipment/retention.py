@@ -0,0 +1,78 @@
+"""Retention of uploads and of everything derived from them.
+
+Policies come from ``EQUIPMENT_RETENTION``, each disabled when None:
+
+* ``KEEP_LATEST`` - number of most recent uploads to keep;
+* ``MAX_AGE_DAYS`` - uploads older than this many days are deleted;
+* ``MAX_BYTES`` - size budget for the stored row data, filled newest first.
+
+An upload is deleted when any policy expires it, but the newest upload is
+always kept. Deletion is set-based: one query per table whatever the number
+of uploads, after which cached reports and row stores no retained upload
+shares are removed.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import EquipmentUpload
+from .reports import delete_cached_reports
+from .storage import dataset_lock, delete_dataset
+
+
+def expired_upload_ids(policy=None, now=None):
+    """Ids of the uploads the retention policies no longer keep."""
+    policy = settings.EQUIPMENT_RETENTION if policy is None else policy
+    uploads = EquipmentUpload.objects.order_by('-upload_timestamp', '-id')
+    newest = uploads.values_list('id', flat=True).first()
+    if newest is None:
+        return set()
+
+    expired = set()
+    if policy.get('KEEP_LATEST') is not None:
+        expired.update(uploads.values_list('id', flat=True)[policy['KEEP_LATEST']:])
+    if policy.get('MAX_AGE_DAYS') is not None:
+        cutoff = (now or timezone.now()) - timedelta(days=policy['MAX_AGE_DAYS'])
+        expired.update(uploads.filter(upload_timestamp__lt=cutoff).values_list('id', flat=True))
+    if policy.get('MAX_BYTES') is not None:
+        # Identical files share one row store, so each is counted once
+        used = 0
+        counted = set()
+        for upload_id, data_path, data_bytes in uploads.values_list('id', 'data_path', 'data_bytes').iterator():
+            if data_path not in counted:
+                counted.add(data_path)
+                used += data_bytes
+            if used > policy['MAX_BYTES']:
+                expired.add(upload_id)
+
+    expired.discard(newest)
+    return expired
+
+
+def delete_uploads(upload_ids):
+    """Delete uploads and their records, cached reports and unshared row stores.
+
+    Returns the number of uploads deleted.
+    """
+    with dataset_lock:
+        doomed = list(EquipmentUpload.objects.filter(id__in=upload_ids).only('id', 'upload_timestamp', 'data_path'))
+        if not doomed:
+            return 0
+        with transaction.atomic():
+            EquipmentUpload.objects.filter(id__in=[upload.id for upload in doomed]).delete()
+
+        delete_cached_reports(doomed)
+        # Still under the lock: no deduplicated upload can start sharing a
+        # store between this check and its removal
+        data_paths = {upload.data_path for upload in doomed if upload.data_path}
+        shared = set(EquipmentUpload.objects.filter(data_path__in=data_paths).values_list('data_path', flat=True))
+        for data_path in data_paths - shared:
+            delete_dataset(data_path)
+    return len(doomed)
+
+
+def prune_uploads(policy=None):
+    """Apply the retention policies; returns the number of uploads deleted."""
+    return delete_uploads(expired_upload_ids(policy))
@@ -0,0 +1,133 @@
+"""Query helpers for the paginated row endpoint.
+
+Filters are evaluated as numpy masks over the memory-mapped columns of a
+``storage.ColumnStore``, so only the requested page is ever decoded.
+
+Supported query parameters:
+
+* ``columns=Pressure,Flowrate`` - column projection;
+* ``Type=Pump,Valve`` - equality filter on a categorical or text column;
+* ``Flowrate__gte=100`` - range filters (``gt``, ``gte``, ``lt``, ``lte``)
+  on numeric columns;
+* ``offset`` / ``limit`` or ``cursor`` / ``limit`` - pagination.
+"""
+import base64
+import binascii
+import operator
+
+import numpy as np
+from django.conf import settings
+
+
+RANGE_OPERATORS = {
+    'gt': operator.gt,
+    'gte': operator.ge,
+    'lt': operator.lt,
+    'lte': operator.le,
+}
+RESERVED_PARAMS = ('columns', 'offset', 'limit', 'cursor', 'format', 'raw_data')
+
+
+def encode_cursor(position):
+    return base64.urlsafe_b64encode(str(position).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        return int(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError('Invalid cursor')
+
+
+def parse_int(params, name, default, minimum=0):
+    value = params.get(name)
+    if value in (None, ''):
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValueError(f"'{name}' must be an integer")
+    if value < minimum:
+        raise ValueError(f"'{name}' must be at least {minimum}")
+    return value
+
+
+def parse_columns(params, store):
+    """Return the projected column list, defaulting to every stored column."""
+    requested = params.get('columns')
+    if not requested:
+        return store.columns
+    columns = [column.strip() for column in requested.split(',') if column.strip()]
+    unknown = [column for column in columns if column not in store.columns]
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+    return columns
+
+
+def filter_mask(params, store):
+    """Build a boolean mask for the filter parameters, or None when unfiltered."""
+    mask = None
+    for key, value in params.items():
+        if key in RESERVED_PARAMS:
+            continue
+        column, _, op = key.partition('__')
+        if column not in store.columns:
+            raise ValueError(f"Unknown filter: {key}")
+        encoding = store.encoding(column)
+        if op:
+            if op not in RANGE_OPERATORS or encoding != 'float64':
+                raise ValueError(f"Unsupported filter: {key}")
+            try:
+                bound = float(value)
+            except ValueError:
+                raise ValueError(f"'{key}' must be a number")
+            condition = RANGE_OPERATORS[op](store.values(column), bound)
+        elif encoding == 'category':
+            categories = store.categories(column)
+            codes = [categories.index(v) for v in value.split(',') if v in categories]
+            condition = np.isin(store.values(column), codes)
+        elif encoding == 'float64':
+            try:
+                targets = [float(v) for v in value.split(',')]
+            except ValueError:
+                raise ValueError(f"'{key}' must be a number")
+            condition = np.isin(store.values(column), targets)
+        else:
+            condition = np.isin(store.decode(column), value.split(','))
+        mask = condition if mask is None else mask & condition
+    return mask
+
+
+def query_rows(params, store, max_limit=None):
+    """Resolve a page of row indices for ``params``.
+
+    ``max_limit`` overrides ``EQUIPMENT_ROWS_MAX_PAGE_SIZE``. Returns
+    ``(indices, columns, page)`` where ``page`` holds the pagination metadata
+    for the response. Raises ``ValueError`` for invalid parameters.
+    """
+    columns = parse_columns(params, store)
+    limit = parse_int(params, 'limit', settings.EQUIPMENT_ROWS_PAGE_SIZE, minimum=1)
+    limit = min(limit, max_limit or settings.EQUIPMENT_ROWS_MAX_PAGE_SIZE)
+
+    mask = filter_mask(params, store)
+    matches = np.arange(len(store)) if mask is None else np.flatnonzero(mask)
+
+    if params.get('cursor'):
+        # Cursors point at a stored row, so they stay valid whatever the filter
+        start = int(np.searchsorted(matches, decode_cursor(params['cursor'])))
+        offset = None
+    else:
+        offset = parse_int(params, 'offset', 0)
+        start = offset
+    indices = matches[start:start + limit]
+
+    next_cursor = None
+    if start + limit < len(matches):
+        next_cursor = encode_cursor(int(matches[start + limit]))
+    page = {
+        'count': int(len(matches)),
+        'offset': offset,
+        'limit': limit,
+        'next_cursor': next_cursor,
+    }
+    return indices, columns, page
@@ -1,11 +1,26 @@
 from rest_framework import serializers
-from .models import EquipmentUpload
+from .models import EquipmentUpload, UploadJob
 
 
 class EquipmentUploadSerializer(serializers.ModelSerializer):
+    has_rows = serializers.SerializerMethodField()
+    
     class Meta:
         model = EquipmentUpload
         fields = ['id', 'filename', 'upload_timestamp', 'avg_flowrate', 
                   'avg_pressure', 'avg_temperature', 'equipment_type_distribution', 
-                  'total_records']
+                  'total_records', 'parameter_stats', 'has_rows', 'content_hash']
         read_only_fields = ['id', 'upload_timestamp']
+    
+    def get_has_rows(self, obj):
+        return bool(obj.data_path)
+
+
+class UploadJobSerializer(serializers.ModelSerializer):
+    upload = EquipmentUploadSerializer(read_only=True)
+    
+    class Meta:
+        model = UploadJob
+        fields = ['id', 'filename', 'status', 'progress', 'error', 'upload',
+                  'created_at', 'updated_at']
+        read_only_fields = fields
@@ -0,0 +1,32 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import token_cache, token_cache_key
+from .models import EquipmentUpload
+from .responsecache import invalidate_responses
+
+
+@receiver(post_save, sender=EquipmentUpload)
+@receiver(post_delete, sender=EquipmentUpload)
+def invalidate_cached_responses(sender, instance, **kwargs):
+    """Drop cached history and summaries once an upload change is committed.
+    
+    Waiting for the commit keeps a concurrent request from caching the state
+    from before the change under the new generation.
+    """
+    transaction.on_commit(invalidate_responses)
+
+
+@receiver(post_delete, sender=Token)
+def evict_deleted_token(sender, instance, **kwargs):
+    token_cache().delete(token_cache_key(instance.key))
+
+
+@receiver(post_save, sender=get_user_model())
+def evict_user_tokens(sender, instance, **kwargs):
+    """Drop cached lookups so changes such as deactivation apply at once."""
+    keys = Token.objects.filter(user=instance).values_list('key', flat=True)
+    token_cache().delete_many([token_cache_key(key) for key in keys])
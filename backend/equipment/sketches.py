@@ -0,0 +1,215 @@
+"""Mergeable distribution sketches for the numeric parameters.
+
+Each upload stores, per parameter, a fixed-width histogram and a t-digest.
+Both are built chunk by chunk during ingestion and both merge exactly the
+way they were built, so sketches from several chunks or several uploads can
+be combined to answer approximate quantile queries without reading rows.
+
+* ``Histogram`` buckets values into bins of ``EQUIPMENT_HISTOGRAM_BIN_WIDTHS``
+  aligned on multiples of the width, so any two histograms with the same
+  width line up. Only non-empty bins are kept.
+* ``TDigest`` is a merging t-digest using the arcsine scale function: small
+  centroids near the tails, large ones near the median. Compression is
+  vectorized; centroids whose cumulative weight falls in the same unit of the
+  scale function are collapsed with ``numpy.bincount``.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+from .stats import NUMERIC_COLUMNS
+
+
+DEFAULT_QUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95, 0.99]
+
+
+def _finite(values):
+    values = pd.to_numeric(values, errors='coerce')
+    values = np.asarray(values, dtype=float)
+    return values[np.isfinite(values)]
+
+
+def _json_float(value):
+    return None if math.isnan(value) or math.isinf(value) else float(value)
+
+
+class Histogram:
+    """Sparse histogram over bins ``[i * bin_width, (i + 1) * bin_width)``."""
+
+    def __init__(self, bin_width, bins=None, counts=None):
+        self.bin_width = float(bin_width)
+        self.counts = dict(zip(bins or [], counts or []))
+
+    def update(self, values):
+        bins, counts = np.unique(np.floor(values / self.bin_width).astype(np.int64), return_counts=True)
+        for index, count in zip(bins.tolist(), counts.tolist()):
+            self.counts[index] = self.counts.get(index, 0) + count
+
+    def merge(self, other):
+        if other.bin_width != self.bin_width:
+            raise ValueError('Cannot merge histograms with different bin widths')
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+
+    def to_dict(self):
+        bins = sorted(self.counts)
+        return {
+            'bin_width': self.bin_width,
+            'bins': bins,
+            'counts': [self.counts[index] for index in bins],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['bin_width'], data['bins'], data['counts'])
+
+    def summary(self):
+        """Bin start values and counts, in ascending order."""
+        bins = sorted(self.counts)
+        return {
+            'bin_width': self.bin_width,
+            'starts': [index * self.bin_width for index in bins],
+            'counts': [self.counts[index] for index in bins],
+        }
+
+
+class TDigest:
+    """Merging t-digest holding centroid means and weights as numpy arrays."""
+
+    def __init__(self, compression, means=(), weights=(), minimum=math.inf, maximum=-math.inf):
+        self.compression = compression
+        self.means = np.asarray(means, dtype=float)
+        self.weights = np.asarray(weights, dtype=float)
+        self.min = minimum
+        self.max = maximum
+
+    @property
+    def count(self):
+        return float(self.weights.sum())
+
+    def update(self, values):
+        if len(values):
+            self._absorb(values, np.ones(len(values)), values.min(), values.max())
+
+    def merge(self, other):
+        if len(other.means):
+            self._absorb(other.means, other.weights, other.min, other.max)
+
+    def _absorb(self, means, weights, minimum, maximum):
+        self.min = min(self.min, float(minimum))
+        self.max = max(self.max, float(maximum))
+        means = np.concatenate([self.means, means])
+        weights = np.concatenate([self.weights, weights])
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+
+        # Scale of the cumulative weight to the left of each centroid; every
+        # output centroid covers at most one unit of it
+        q = (np.cumsum(weights) - weights) / weights.sum()
+        k = self.compression / (2 * math.pi) * np.arcsin(2 * q - 1)
+        labels = np.floor(k - k[0]).astype(np.int64)
+        totals = np.bincount(labels, weights=weights)
+        sums = np.bincount(labels, weights=means * weights)
+        keep = totals > 0
+        self.means = sums[keep] / totals[keep]
+        self.weights = totals[keep]
+
+    def quantile(self, q):
+        """Approximate values at quantiles ``q`` (a scalar or array in [0, 1])."""
+        total = self.count
+        if not total:
+            return np.full(np.shape(q), np.nan)
+        # Interpolate between centroid centres, pinned to the exact extremes
+        centres = np.cumsum(self.weights) - self.weights / 2
+        positions = np.concatenate([[0.0], centres, [total]])
+        values = np.concatenate([[self.min], self.means, [self.max]])
+        return np.interp(np.asarray(q) * total, positions, values)
+
+    def to_dict(self):
+        return {
+            'compression': self.compression,
+            'means': self.means.tolist(),
+            'weights': self.weights.tolist(),
+            'min': _json_float(self.min),
+            'max': _json_float(self.max),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data['compression'], data['means'], data['weights'],
+            math.inf if data['min'] is None else data['min'],
+            -math.inf if data['max'] is None else data['max'],
+        )
+
+
+class ParameterSketches:
+    """Histogram and t-digest for every numeric column."""
+
+    def __init__(self, sketches=None):
+        if sketches is None:
+            sketches = {
+                column: {
+                    'histogram': Histogram(settings.EQUIPMENT_HISTOGRAM_BIN_WIDTHS[column]),
+                    'digest': TDigest(settings.EQUIPMENT_SKETCH_COMPRESSION),
+                }
+                for column in NUMERIC_COLUMNS
+            }
+        self.sketches = sketches
+
+    def update(self, chunk):
+        for column, sketch in self.sketches.items():
+            values = _finite(chunk[column])
+            sketch['histogram'].update(values)
+            sketch['digest'].update(values)
+        return self
+
+    def merge(self, other):
+        for column, sketch in self.sketches.items():
+            sketch['histogram'].merge(other.sketches[column]['histogram'])
+            sketch['digest'].merge(other.sketches[column]['digest'])
+        return self
+
+    def to_dict(self):
+        return {
+            column: {
+                'histogram': sketch['histogram'].to_dict(),
+                'digest': sketch['digest'].to_dict(),
+            }
+            for column, sketch in self.sketches.items()
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls({
+            column: {
+                'histogram': Histogram.from_dict(sketch['histogram']),
+                'digest': TDigest.from_dict(sketch['digest']),
+            }
+            for column, sketch in data.items()
+        })
+
+    def summary(self, quantiles, columns=NUMERIC_COLUMNS):
+        """JSON-ready quantiles and histogram for each of ``columns``."""
+        result = {}
+        for column in columns:
+            digest = self.sketches[column]['digest']
+            estimates = digest.quantile(quantiles)
+            result[column] = {
+                'count': int(digest.count),
+                'min': _json_float(digest.min),
+                'max': _json_float(digest.max),
+                'quantiles': {str(q): _json_float(value) for q, value in zip(quantiles, estimates)},
+                'histogram': self.sketches[column]['histogram'].summary(),
+            }
+        return result
+
+
+def merge_sketches(sketch_dicts):
+    """Merge stored sketch dicts (e.g. from several uploads) into one."""
+    merged = ParameterSketches()
+    for data in sketch_dicts:
+        merged.merge(ParameterSketches.from_dict(data))
+    return merged
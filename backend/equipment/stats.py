@@ -0,0 +1,119 @@
+"""Descriptive statistics per parameter, overall and per equipment type.
+
+``compute_parameter_stats`` works on a DataFrame already in memory: it groups
+by ``Type`` once and runs every statistic in a single ``agg`` call over that
+grouping (plus one over the whole frame), so no Python loop touches the
+rows. ``RunningMoments`` gives the exact moments of data read chunk by
+chunk; streamed uploads take their medians and 95th percentiles from
+t-digests instead (see ``ingest.StatsAccumulator``). Both produce the same
+JSON-ready shape, stored on ``EquipmentUpload.parameter_stats``, where
+``approximate`` tells whether the medians and 95th percentiles are estimates
+(it is missing on uploads stored before it was added)::
+
+    {
+        "approximate": false,
+        "overall": {"Flowrate": {"count": 15, "mean": 119.8, ...}, ...},
+        "by_type": {"Pump": {"Flowrate": {...}, ...}, ...}
+    }
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+
+NUMERIC_COLUMNS = ['Flowrate', 'Pressure', 'Temperature']
+STATISTICS = ['count', 'mean', 'min', 'max', 'std', 'median', 'p95']
+
+
+def p95(values):
+    return values.quantile(0.95)
+
+
+AGGREGATIONS = ['count', 'mean', 'min', 'max', 'std', 'median', p95]
+
+
+def _clean(stat, value):
+    if stat == 'count':
+        return int(value)
+    # JSON has no NaN; empty groups and single-row std come out as null
+    value = float(value)
+    return None if math.isnan(value) else value
+
+
+def compute_parameter_stats(df):
+    """Compute per-type and overall statistics for the numeric columns of ``df``."""
+    numeric = df[NUMERIC_COLUMNS].apply(pd.to_numeric, errors='coerce')
+    # Rows are statistics, columns are parameters
+    overall = numeric.agg(AGGREGATIONS)
+    # One row per type, columns are (parameter, statistic) pairs
+    grouped = numeric.groupby(df['Type'], sort=False, observed=True).agg(AGGREGATIONS)
+
+    result = {
+        'approximate': False,
+        'overall': {
+            column: {stat: _clean(stat, overall.at[stat, column]) for stat in STATISTICS}
+            for column in NUMERIC_COLUMNS
+        },
+        'by_type': {},
+    }
+    for eq_type, row in grouped.iterrows():
+        result['by_type'][str(eq_type)] = {
+            column: {stat: _clean(stat, row[(column, stat)]) for stat in STATISTICS}
+            for column in NUMERIC_COLUMNS
+        }
+    return result
+
+
+class RunningMoments:
+    """Exact count, mean, standard deviation, min and max of every numeric column.
+
+    Each ``update`` reduces a chunk with one ``agg`` call and folds the result
+    in with Chan et al.'s pairwise update, so only a few numbers per column
+    are kept however many rows go through.
+    """
+
+    def __init__(self):
+        size = len(NUMERIC_COLUMNS)
+        self.count = np.zeros(size)
+        self.mean = np.zeros(size)
+        self.m2 = np.zeros(size)
+        self.min = np.full(size, np.inf)
+        self.max = np.full(size, -np.inf)
+
+    def update(self, numeric):
+        """Fold in a DataFrame of the numeric columns (already coerced to floats)."""
+        if not len(numeric):
+            return
+        part = numeric[NUMERIC_COLUMNS].agg(['count', 'mean', 'var', 'min', 'max'])
+        count = part.loc['count'].to_numpy(dtype=float)
+        # Empty columns come out as NaN; a single value has no variance
+        mean = np.nan_to_num(part.loc['mean'].to_numpy(dtype=float))
+        m2 = np.nan_to_num(part.loc['var'].to_numpy(dtype=float) * (count - 1))
+        total = self.count + count
+        delta = mean - self.mean
+        share = np.divide(count, total, out=np.zeros_like(total), where=total > 0)
+        self.m2 = self.m2 + m2 + delta ** 2 * self.count * share
+        self.mean = self.mean + delta * share
+        self.count = total
+        self.min = np.fmin(self.min, part.loc['min'].to_numpy(dtype=float))
+        self.max = np.fmax(self.max, part.loc['max'].to_numpy(dtype=float))
+
+    def summary(self, median, p95):
+        """Per-column statistics, given arrays of each column's median and p95."""
+        result = {}
+        for index, column in enumerate(NUMERIC_COLUMNS):
+            count = int(self.count[index])
+            stats = {
+                'count': count,
+                'mean': self.mean[index],
+                'min': self.min[index],
+                'max': self.max[index],
+                'std': math.sqrt(self.m2[index] / (count - 1)) if count > 1 else math.nan,
+                'median': median[index],
+                'p95': p95[index],
+            }
+            if not count:
+                stats.update(mean=math.nan, min=math.nan, max=math.nan, median=math.nan, p95=math.nan)
+            result[column] = {stat: _clean(stat, stats[stat]) for stat in STATISTICS}
+        return result
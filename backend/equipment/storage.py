@@ -0,0 +1,237 @@
+"""Columnar on-disk storage for the rows of each upload.
+
+Every upload gets its own directory under ``EQUIPMENT_DATA_ROOT`` holding one
+raw little-endian file per column plus a ``manifest.json``. Readers map the
+files with ``numpy.memmap`` so reopening an upload never re-parses the CSV:
+
+* numeric columns are ``float64`` (missing values stay NaN);
+* ``Type`` is dictionary encoded as ``int32`` codes, -1 marking a missing value;
+* free-text columns are Arrow-style ``int64`` offsets into a UTF-8 data file,
+  missing values being stored as empty strings.
+"""
+import json
+import shutil
+import threading
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+
+COLUMN_ENCODINGS = {
+    'Equipment Name': 'utf8',
+    'Type': 'category',
+    'Flowrate': 'float64',
+    'Pressure': 'float64',
+    'Temperature': 'float64',
+}
+MANIFEST_NAME = 'manifest.json'
+FORMAT_VERSION = 1
+
+# Held while a stored dataset is reused by a new upload or removed, so that
+# retention never deletes a store a deduplicated upload has just taken over
+dataset_lock = threading.Lock()
+
+
+def dataset_dir(name):
+    return Path(settings.EQUIPMENT_DATA_ROOT) / name
+
+
+def column_to_list(values):
+    """Convert a numpy column to a JSON-safe list (NaN becomes null)."""
+    if values.dtype.kind == 'f':
+        missing = np.isnan(values)
+        if missing.any():
+            values = np.where(missing, None, values)
+    return values.tolist()
+
+
+def column_slug(column):
+    return column.lower().replace(' ', '_')
+
+
+def dataset_exists(name):
+    return bool(name) and (dataset_dir(name) / MANIFEST_NAME).exists()
+
+
+def dataset_size(name):
+    """Total size in bytes of the files of a stored dataset."""
+    return sum(path.stat().st_size for path in dataset_dir(name).iterdir())
+
+
+def delete_dataset(name):
+    """Remove a stored dataset; missing directories are ignored."""
+    if name:
+        shutil.rmtree(dataset_dir(name), ignore_errors=True)
+
+
+def _map(path, dtype, length):
+    # numpy refuses to map empty files
+    if length == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', shape=(length,))
+
+
+def _positions(rows, length):
+    """Row numbers selected by a slice, an index array or a boolean mask."""
+    if isinstance(rows, slice):
+        return np.arange(*rows.indices(length))
+    rows = np.asarray(rows)
+    if rows.dtype == bool:
+        return np.flatnonzero(rows)
+    return np.where(rows < 0, rows + length, rows)
+
+
+class ColumnStoreWriter:
+    """Append DataFrame chunks to a new columnar dataset."""
+
+    def __init__(self, name=None):
+        self.name = name or uuid.uuid4().hex
+        self.path = dataset_dir(self.name)
+        self.path.mkdir(parents=True, exist_ok=False)
+        self.num_rows = 0
+        self._files = {}
+        self._categories = {col: {} for col, enc in COLUMN_ENCODINGS.items() if enc == 'category'}
+        self._offsets = {col: 0 for col, enc in COLUMN_ENCODINGS.items() if enc == 'utf8'}
+        for column, encoding in COLUMN_ENCODINGS.items():
+            slug = column_slug(column)
+            if encoding == 'float64':
+                self._open(slug + '.f64')
+            elif encoding == 'category':
+                self._open(slug + '.codes')
+            else:
+                self._open(slug + '.offsets').write(np.zeros(1, dtype='<i8').tobytes())
+                self._open(slug + '.data')
+
+    def _open(self, filename):
+        handle = open(self.path / filename, 'wb')
+        self._files[filename] = handle
+        return handle
+
+    def append(self, chunk):
+        for column, encoding in COLUMN_ENCODINGS.items():
+            slug = column_slug(column)
+            values = chunk[column]
+            if encoding == 'float64':
+                data = pd.to_numeric(values, errors='coerce').to_numpy(dtype='<f8')
+                self._files[slug + '.f64'].write(data.tobytes())
+            elif encoding == 'category':
+                self._files[slug + '.codes'].write(self._encode_categories(column, values).tobytes())
+            else:
+                self._write_strings(column, slug, values)
+        self.num_rows += len(chunk)
+
+    def _encode_categories(self, column, values):
+        codes, uniques = pd.factorize(values)
+        index = self._categories[column]
+        # Translate chunk-local codes into codes that are stable across chunks
+        mapping = np.array([index.setdefault(str(value), len(index)) for value in uniques], dtype='<i4')
+        if not len(mapping):
+            return np.full(len(codes), -1, dtype='<i4')
+        return np.where(codes >= 0, mapping[codes], -1).astype('<i4')
+
+    def _write_strings(self, column, slug, values):
+        encoded = [value.encode('utf-8') for value in values.fillna('').astype(str)]
+        lengths = np.fromiter((len(value) for value in encoded), dtype='<i8', count=len(encoded))
+        offsets = self._offsets[column] + np.cumsum(lengths)
+        if len(offsets):
+            self._offsets[column] = int(offsets[-1])
+        self._files[slug + '.offsets'].write(offsets.astype('<i8').tobytes())
+        self._files[slug + '.data'].write(b''.join(encoded))
+
+    def close(self):
+        """Flush all column files and write the manifest."""
+        for handle in self._files.values():
+            handle.close()
+        manifest = {
+            'version': FORMAT_VERSION,
+            'num_rows': self.num_rows,
+            'columns': {
+                column: {
+                    'encoding': encoding,
+                    'categories': list(self._categories[column]) if encoding == 'category' else None,
+                }
+                for column, encoding in COLUMN_ENCODINGS.items()
+            },
+        }
+        with open(self.path / MANIFEST_NAME, 'w') as handle:
+            json.dump(manifest, handle)
+        return self.name
+
+    def abort(self):
+        """Discard a partially written dataset."""
+        for handle in self._files.values():
+            handle.close()
+        delete_dataset(self.name)
+
+
+class ColumnStore:
+    """Read-only, memory-mapped view of a stored dataset."""
+
+    def __init__(self, name):
+        self.name = name
+        self.path = dataset_dir(name)
+        with open(self.path / MANIFEST_NAME) as handle:
+            self.manifest = json.load(handle)
+        self.num_rows = self.manifest['num_rows']
+        self.columns = list(self.manifest['columns'])
+
+    def __len__(self):
+        return self.num_rows
+
+    def encoding(self, column):
+        return self.manifest['columns'][column]['encoding']
+
+    def categories(self, column):
+        return self.manifest['columns'][column]['categories']
+
+    def values(self, column):
+        """Return the raw memory-mapped array backing ``column``.
+
+        Numeric columns map to their float64 values and categorical columns
+        to their int32 codes; free-text columns map to their offsets.
+        """
+        slug = column_slug(column)
+        encoding = self.encoding(column)
+        if encoding == 'float64':
+            return _map(self.path / (slug + '.f64'), '<f8', self.num_rows)
+        if encoding == 'category':
+            return _map(self.path / (slug + '.codes'), '<i4', self.num_rows)
+        return _map(self.path / (slug + '.offsets'), '<i8', self.num_rows + 1)
+
+    def decode(self, column, rows=slice(None)):
+        """Materialize ``column`` (optionally a slice or index array) as a numpy array."""
+        encoding = self.encoding(column)
+        if encoding == 'float64':
+            return np.asarray(self.values(column)[rows])
+        if encoding == 'category':
+            categories = np.array(self.categories(column) + [None], dtype=object)
+            # code -1 indexes the trailing None
+            return categories[self.values(column)[rows]]
+        offsets = self.values(column)
+        if isinstance(rows, slice) and rows.step in (None, 1):
+            # A contiguous range: its bounds are one slice of the offsets
+            start, stop, _ = rows.indices(self.num_rows)
+            bounds = np.asarray(offsets[start:max(start, stop) + 1])
+            starts, ends = bounds[:-1], bounds[1:]
+        else:
+            positions = _positions(rows, self.num_rows)
+            starts, ends = offsets[positions], offsets[positions + 1]
+        # Only the requested strings are read and decoded
+        data = memoryview(_map(self.path / (column_slug(column) + '.data'), 'u1', int(offsets[-1])))
+        return np.array(
+            [str(data[start:end], 'utf-8') for start, end in zip(starts.tolist(), ends.tolist())],
+            dtype=object,
+        )
+
+    def to_frame(self, columns=None, rows=slice(None)):
+        columns = columns or self.columns
+        return pd.DataFrame({column: self.decode(column, rows) for column in columns})
+
+    def records(self, columns=None, rows=slice(None)):
+        """Rows as dicts, JSON-safe: missing numbers are None rather than NaN."""
+        columns = columns or self.columns
+        values = [column_to_list(self.decode(column, rows)) for column in columns]
+        return [dict(zip(columns, row)) for row in zip(*values)]
@@ -0,0 +1,313 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO
+from unittest import mock, skipIf
+
+import numpy as np
+import pandas as pd
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .ingest import find_cached_upload, ingest_csv_stream, process_csv_data, validate_csv
+from .models import EquipmentRecord, EquipmentUpload, TrendRollup
+from .renderers import pa
+from .retention import delete_uploads, expired_upload_ids
+from .sketches import DEFAULT_QUANTILES, Histogram, TDigest, merge_sketches
+from .stats import NUMERIC_COLUMNS, STATISTICS, RunningMoments, compute_parameter_stats
+from .storage import ColumnStore, ColumnStoreWriter, dataset_exists, delete_dataset
+
+CSV = (
+    b'Equipment Name,Type,Flowrate,Pressure,Temperature\n'
+    b'A,Pump,1,,3\n'
+    b'B,Valve,4,5,6\n'
+)
+
+
+class UploadTestCase(TestCase):
+    def setUp(self):
+        self.data_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.data_root, ignore_errors=True)
+        settings = override_settings(EQUIPMENT_DATA_ROOT=self.data_root, EQUIPMENT_DEDUPLICATE_UPLOADS=False)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('tester', password='secret'))
+
+    def upload(self, content):
+        response = self.client.post(
+            '/api/upload/?raw_data=0',
+            {'file': SimpleUploadedFile('equipment.csv', content)},
+            format='multipart',
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+
+
+class UploadTests(UploadTestCase):
+    def test_rows_with_missing_values_are_null(self):
+        upload_id = self.upload(CSV)
+        response = self.client.get(f'/api/uploads/{upload_id}/rows/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [
+            {'Equipment Name': 'A', 'Type': 'Pump', 'Flowrate': 1.0, 'Pressure': None, 'Temperature': 3.0},
+            {'Equipment Name': 'B', 'Type': 'Valve', 'Flowrate': 4.0, 'Pressure': 5.0, 'Temperature': 6.0},
+        ])
+
+    @override_settings(FILE_UPLOAD_HANDLERS=['django.core.files.uploadhandler.MemoryFileUploadHandler'])
+    def test_upload_hashed_in_the_view_is_parsed(self):
+        upload = EquipmentUpload.objects.get(id=self.upload(CSV))
+        self.assertEqual(upload.total_records, 2)
+        self.assertEqual(len(upload.content_hash), 64)
+
+    def test_numeric_types_count_their_records_in_trends(self):
+        self.upload(
+            b'Equipment Name,Type,Flowrate,Pressure,Temperature\n'
+            b'A,1,1,2,3\n'
+            b'B,1,4,5,6\n'
+            b'C,2,7,8,9\n'
+        )
+        counts = dict(TrendRollup.objects.values_list('equipment_type', 'record_count'))
+        self.assertEqual(counts, {'1': 2, '2': 1})
+
+    @skipIf(pa is None, 'pyarrow is not installed')
+    def test_unauthenticated_arrow_request_gets_json_error(self):
+        upload_id = self.upload(CSV)
+        response = APIClient().get(f'/api/uploads/{upload_id}/rows/?format=arrow')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertIn('detail', response.json())
+
+    @override_settings(EQUIPMENT_DEDUPLICATE_UPLOADS=True)
+    def test_cache_hit_deleted_by_retention_is_parsed_again(self):
+        cached = EquipmentUpload.objects.get(id=self.upload(CSV))
+        # Retention in another process removes the upload after the lookup found it
+        def find_then_delete(content_hash):
+            found = find_cached_upload(content_hash)
+            EquipmentUpload.objects.filter(id=cached.id).delete()
+            delete_dataset(cached.data_path)
+            return found
+
+        with mock.patch('equipment.ingest.find_cached_upload', side_effect=find_then_delete):
+            upload_id = self.upload(CSV)
+        upload = EquipmentUpload.objects.get(id=upload_id)
+        self.assertNotEqual(upload.data_path, cached.data_path)
+        self.assertTrue(dataset_exists(upload.data_path))
+        response = self.client.get(f'/api/uploads/{upload_id}/rows/')
+        self.assertEqual(len(response.json()['results']), 2)
+
+
+class ColumnStoreTests(SimpleTestCase):
+    def setUp(self):
+        data_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, data_root, ignore_errors=True)
+        settings = override_settings(EQUIPMENT_DATA_ROOT=data_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.names = ['Pümp-0', None, 'Valve-2', 'Ventil-3', '', 'Mixer-5']
+        writer = ColumnStoreWriter()
+        writer.append(pd.DataFrame({
+            'Equipment Name': self.names,
+            'Type': ['Pump', None, 'Valve', 'Valve', 'Mixer', 'Mixer'],
+            'Flowrate': [1.0, np.nan, 3.0, 4.0, 5.0, 6.0],
+            'Pressure': 1.0,
+            'Temperature': 1.0,
+        }))
+        self.store = ColumnStore(writer.close())
+
+    def test_decode_text_rows(self):
+        # Missing text is stored as the empty string
+        expected = np.array([name or '' for name in self.names], dtype=object)
+        for rows in [slice(None), slice(1, 4), slice(4, 1), slice(None, None, 2), slice(-2, None),
+                     np.array([5, 0, 2]), np.array([-1]), expected != '', np.array([], dtype=int)]:
+            with self.subTest(rows=rows):
+                self.assertEqual(self.store.decode('Equipment Name', rows).tolist(), expected[rows].tolist())
+
+
+def equipment_frame(rows, seed=0):
+    """Random equipment rows with some missing readings."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'Equipment Name': [f'E-{i}' for i in range(rows)],
+        'Type': rng.choice(['Pump', 'Valve', 'Compressor'], rows),
+        'Flowrate': rng.normal(120, 15, rows),
+        'Pressure': rng.lognormal(1.5, 0.4, rows),
+        'Temperature': rng.uniform(80, 140, rows),
+    })
+    for column in NUMERIC_COLUMNS:
+        df.loc[rng.random(rows) < 0.05, column] = np.nan
+    # A type that only turns up near the end of the file
+    df.loc[rows - 3:, 'Type'] = 'Mixer'
+    return df
+
+
+class StatsTests(SimpleTestCase):
+    def assertStatsEqual(self, actual, expected, stats, places=7):
+        for column in NUMERIC_COLUMNS:
+            for stat in stats:
+                with self.subTest(column=column, stat=stat):
+                    if expected[column][stat] is None:
+                        self.assertIsNone(actual[column][stat])
+                    else:
+                        self.assertAlmostEqual(actual[column][stat], expected[column][stat], places=places)
+
+    def test_running_moments_merge_uneven_chunks(self):
+        df = equipment_frame(1000)[NUMERIC_COLUMNS]
+        df.loc[200:260, 'Pressure'] = np.nan
+        moments = RunningMoments()
+        # Empty, single-row and all-missing chunks included
+        for start, stop in [(0, 0), (0, 1), (1, 200), (200, 260), (260, 261), (261, 1000)]:
+            moments.update(df.iloc[start:stop])
+        median, p95 = df.median().to_numpy(), df.quantile(0.95).to_numpy()
+        expected = compute_parameter_stats(df.assign(Type='all'))['overall']
+        self.assertStatsEqual(moments.summary(median, p95), expected, STATISTICS)
+
+    def test_running_moments_without_rows(self):
+        summary = RunningMoments().summary([np.nan] * 3, [np.nan] * 3)
+        for column in NUMERIC_COLUMNS:
+            self.assertEqual(summary[column], dict.fromkeys(STATISTICS, None) | {'count': 0})
+
+    def test_streamed_stats_match_in_memory_stats(self):
+        df = equipment_frame(5000)
+        buffer = BytesIO()
+        df.to_csv(buffer, index=False)
+        streamed, error = ingest_csv_stream(buffer, 777, validate_csv)
+        self.assertIsNone(error)
+        in_memory = process_csv_data(df)
+        for key in ['avg_flowrate', 'avg_pressure', 'avg_temperature', 'total_records']:
+            self.assertEqual(streamed[key], in_memory[key])
+        self.assertEqual(streamed['equipment_type_distribution'], in_memory['equipment_type_distribution'])
+
+        exact = compute_parameter_stats(df)
+        approximate = streamed['parameter_stats']
+        self.assertFalse(exact['approximate'])
+        self.assertTrue(approximate['approximate'])
+        self.assertEqual(set(approximate['by_type']), set(exact['by_type']))
+        moments = ['count', 'mean', 'min', 'max', 'std']
+        self.assertStatsEqual(approximate['overall'], exact['overall'], moments)
+        for eq_type, expected in exact['by_type'].items():
+            self.assertStatsEqual(approximate['by_type'][eq_type], expected, moments)
+            # Quantiles are t-digest estimates: their rank in the data must be
+            # close to the one asked for, give or take one value
+            values = df.loc[df['Type'] == eq_type, NUMERIC_COLUMNS]
+            for column in NUMERIC_COLUMNS:
+                column_values = values[column].dropna().to_numpy()
+                for stat, q in [('median', 0.5), ('p95', 0.95)]:
+                    with self.subTest(eq_type=eq_type, column=column, stat=stat):
+                        rank = np.mean(column_values <= approximate['by_type'][eq_type][column][stat])
+                        self.assertLessEqual(abs(rank - q), 0.01 + 1 / len(column_values))
+
+
+class SketchTests(SimpleTestCase):
+    def setUp(self):
+        self.values = np.random.default_rng(1).lognormal(1.5, 0.6, 200_000)
+
+    def test_histogram_merge_is_exact(self):
+        whole = Histogram(0.25)
+        whole.update(self.values - 5)
+        merged = Histogram(0.25)
+        for part in np.array_split(self.values - 5, 9):
+            histogram = Histogram(0.25)
+            histogram.update(part)
+            merged.merge(Histogram.from_dict(histogram.to_dict()))
+        self.assertEqual(merged.counts, whole.counts)
+        self.assertEqual(sum(merged.counts.values()), len(self.values))
+        # Bins are aligned on multiples of the width, negative values included
+        self.assertEqual(min(merged.counts), int(np.floor((self.values.min() - 5) / 0.25)))
+
+    def test_histogram_merge_needs_the_same_bin_width(self):
+        with self.assertRaises(ValueError):
+            Histogram(0.25).merge(Histogram(0.5))
+
+    def test_merged_tdigest_quantiles(self):
+        merged = TDigest(200)
+        for chunk in np.array_split(self.values, 13):
+            digest = TDigest(200)
+            for part in np.array_split(chunk, 7):
+                digest.update(part)
+            merged.merge(TDigest.from_dict(digest.to_dict()))
+        self.assertEqual(merged.count, len(self.values))
+        self.assertEqual((merged.min, merged.max), (self.values.min(), self.values.max()))
+        # Compression bounds the size however many digests were merged
+        self.assertLessEqual(len(merged.means), 200)
+        for q in DEFAULT_QUANTILES + [0.001, 0.999]:
+            with self.subTest(q=q):
+                rank = np.mean(self.values <= merged.quantile(q))
+                # Tails are kept in finer centroids than the middle
+                self.assertLess(abs(rank - q), 0.002 if min(q, 1 - q) <= 0.01 else 0.005)
+
+    def test_empty_tdigest(self):
+        self.assertTrue(np.isnan(TDigest(200).quantile(0.5)))
+
+    def test_merge_upload_sketches(self):
+        frames = [equipment_frame(3000, seed) for seed in range(3)]
+        sketches = []
+        for df in frames:
+            buffer = BytesIO()
+            df.to_csv(buffer, index=False)
+            sketches.append(ingest_csv_stream(buffer, 1000, validate_csv)[0]['sketches'])
+        summary = merge_sketches(sketches).summary([0.5, 0.95])
+        combined = pd.concat(frames)
+        for column in NUMERIC_COLUMNS:
+            with self.subTest(column=column):
+                values = combined[column].dropna().to_numpy()
+                self.assertEqual(summary[column]['count'], len(values))
+                self.assertEqual(sum(summary[column]['histogram']['counts']), len(values))
+                self.assertEqual(summary[column]['max'], values.max())
+                for q, estimate in summary[column]['quantiles'].items():
+                    self.assertLess(abs(np.mean(values <= estimate) - float(q)), 0.01)
+
+
+class RetentionTests(UploadTestCase):
+    def make_uploads(self, *contents):
+        """Upload ``contents`` oldest first, one day apart; returns their ids."""
+        ids = [self.upload(content) for content in contents]
+        now = timezone.now()
+        for age, upload_id in enumerate(reversed(ids)):
+            EquipmentUpload.objects.filter(id=upload_id).update(upload_timestamp=now - timedelta(days=age))
+        return ids
+
+    def csv(self, name):
+        return CSV + f'{name},Pump,1,2,3\n'.encode()
+
+    def test_keep_latest(self):
+        ids = self.make_uploads(*[self.csv(name) for name in 'abcd'])
+        self.assertEqual(expired_upload_ids({'KEEP_LATEST': 2}), set(ids[:2]))
+        # The newest upload is always kept
+        self.assertEqual(expired_upload_ids({'KEEP_LATEST': 0}), set(ids[:3]))
+        self.assertEqual(expired_upload_ids({}), set())
+
+    def test_max_age(self):
+        ids = self.make_uploads(*[self.csv(name) for name in 'abcd'])
+        self.assertEqual(expired_upload_ids({'MAX_AGE_DAYS': 1.5}), set(ids[:2]))
+
+    @override_settings(EQUIPMENT_DEDUPLICATE_UPLOADS=True)
+    def test_max_bytes_counts_shared_stores_once(self):
+        oldest, older, shared, newest = self.make_uploads(
+            self.csv('a'), self.csv('b'), self.csv('c'), self.csv('c'))
+        uploads = EquipmentUpload.objects.all()
+        self.assertEqual(uploads.get(id=shared).data_path, uploads.get(id=newest).data_path)
+        uploads.update(data_bytes=40)
+        self.assertEqual(expired_upload_ids({'MAX_BYTES': 100}), {oldest})
+        self.assertEqual(expired_upload_ids({'MAX_BYTES': 39}), {oldest, older, shared})
+
+    @override_settings(EQUIPMENT_DEDUPLICATE_UPLOADS=True)
+    def test_delete_keeps_stores_still_shared(self):
+        unique, first, second = self.make_uploads(self.csv('a'), self.csv('b'), self.csv('b'))
+        paths = dict(EquipmentUpload.objects.values_list('id', 'data_path'))
+        self.assertEqual(paths[first], paths[second])
+
+        self.assertEqual(delete_uploads([unique, first]), 2)
+        self.assertEqual(list(EquipmentUpload.objects.values_list('id', flat=True)), [second])
+        self.assertFalse(dataset_exists(paths[unique]))
+        self.assertTrue(dataset_exists(paths[second]))
+        self.assertEqual(set(EquipmentRecord.objects.values_list('upload_id', flat=True)), {second})
+        response = self.client.get(f'/api/uploads/{second}/rows/')
+        self.assertEqual(len(response.json()['results']), 3)
+
+        self.assertEqual(delete_uploads([second, unique]), 1)
+        self.assertFalse(dataset_exists(paths[second]))
+        self.assertEqual(delete_uploads([second]), 0)
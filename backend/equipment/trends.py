@@ -0,0 +1,98 @@
+"""Per-day, per-type rollups of the upload statistics.
+
+Every upload adds its per-type sums and counts to the ``TrendRollup`` row of
+its day, so trend queries read one row per bucket no matter how many uploads
+or rows went into it. Rollups outlive the uploads pruned from the history.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .models import TrendRollup
+from .stats import NUMERIC_COLUMNS
+
+
+INTERVALS = {
+    'day': None,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+
+def _field(column):
+    return column.lower()
+
+
+def rollup_increments(upload):
+    """Map each equipment type of ``upload`` to the amounts it adds to its rollup."""
+    # Stats are keyed by str; a fresh upload's distribution still has the
+    # key types pandas read, e.g. ints for numeric type codes
+    distribution = {str(eq_type): count for eq_type, count in upload.equipment_type_distribution.items()}
+    increments = {}
+    for eq_type, columns in upload.parameter_stats.get('by_type', {}).items():
+        amounts = {
+            'upload_count': 1,
+            'record_count': distribution.get(eq_type, 0),
+        }
+        for column in NUMERIC_COLUMNS:
+            stats = columns[column]
+            amounts[f'{_field(column)}_sum'] = (stats['mean'] or 0.0) * stats['count']
+            amounts[f'{_field(column)}_count'] = stats['count']
+        increments[eq_type] = amounts
+    return increments
+
+
+def record_upload_trends(upload):
+    """Fold the statistics of a new upload into the rollups of its day."""
+    day = timezone.localdate(upload.upload_timestamp)
+    for eq_type, amounts in rollup_increments(upload).items():
+        rollups = TrendRollup.objects.filter(day=day, equipment_type=eq_type)
+        changes = {name: F(name) + value for name, value in amounts.items()}
+        if rollups.update(**changes):
+            continue
+        try:
+            with transaction.atomic():
+                TrendRollup.objects.create(day=day, equipment_type=eq_type, **amounts)
+        except IntegrityError:
+            # Another upload created the row first
+            rollups.update(**changes)
+
+
+def trend_buckets(interval='day', since=None, until=None, types=None):
+    """Average of every parameter per bucket and type, read from the rollups only.
+
+    ``since`` and ``until`` are dates; ``types`` restricts the equipment types.
+    """
+    if interval not in INTERVALS:
+        raise ValueError(f"'interval' must be one of: {', '.join(INTERVALS)}")
+    rollups = TrendRollup.objects.all()
+    if since:
+        rollups = rollups.filter(day__gte=since)
+    if until:
+        rollups = rollups.filter(day__lt=until)
+    if types:
+        rollups = rollups.filter(equipment_type__in=types)
+
+    truncate = INTERVALS[interval]
+    period = truncate('day') if truncate else F('day')
+    totals = {'uploads': Sum('upload_count'), 'records': Sum('record_count')}
+    for column in NUMERIC_COLUMNS:
+        totals[f'{_field(column)}_sum'] = Sum(f'{_field(column)}_sum')
+        totals[f'{_field(column)}_count'] = Sum(f'{_field(column)}_count')
+    buckets = (rollups.annotate(period=period).values('period', 'equipment_type')
+               .annotate(**totals).order_by('period', 'equipment_type'))
+
+    results = []
+    for bucket in buckets:
+        result = {
+            'period': bucket['period'],
+            'equipment_type': bucket['equipment_type'],
+            'uploads': bucket['uploads'],
+            'records': bucket['records'],
+        }
+        for column in NUMERIC_COLUMNS:
+            count = bucket[f'{_field(column)}_count']
+            result[f'avg_{_field(column)}'] = bucket[f'{_field(column)}_sum'] / count if count else None
+        results.append(result)
+    return results
@@ -0,0 +1,27 @@
+import hashlib
+
+from django.core.files.uploadhandler import FileUploadHandler
+
+
+class ContentHashUploadHandler(FileUploadHandler):
+    """Hash uploaded files while their chunks stream in.
+
+    Must come first in ``FILE_UPLOAD_HANDLERS``: every chunk is passed on
+    unchanged to the next handler, and the SHA-256 hex digest of each file is
+    recorded in ``request.upload_digests`` under its field name.
+    """
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.hasher = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.hasher.update(raw_data)
+        return raw_data
+
+    def file_complete(self, file_size):
+        if not hasattr(self.request, 'upload_digests'):
+            self.request.upload_digests = {}
+        self.request.upload_digests[self.field_name] = self.hasher.hexdigest()
+        # Let the next handler build the uploaded file object
+        return None
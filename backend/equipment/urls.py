@@ -1,8 +1,19 @@
 from django.urls import path
+from rest_framework.authtoken.views import obtain_auth_token
 from . import views
 
 urlpatterns = [
+    path('auth/token/', obtain_auth_token, name='obtain_auth_token'),
     path('upload/', views.upload_csv, name='upload_csv'),
+    path('jobs/<uuid:job_id>/', views.get_job, name='get_job'),
     path('history/', views.get_history, name='get_history'),
+    path('uploads/<int:upload_id>/', views.get_upload, name='get_upload'),
+    path('uploads/<int:upload_id>/rows/', views.get_upload_rows, name='get_upload_rows'),
+    path('records/', views.get_records, name='get_records'),
+    path('records/aggregate/', views.get_record_aggregates, name='get_record_aggregates'),
+    path('trends/', views.get_trends, name='get_trends'),
+    path('quantiles/', views.get_quantiles, name='get_quantiles'),
     path('report/', views.generate_report, name='generate_report'),
+    path('report/batch/', views.generate_batch_report, name='generate_batch_report'),
+    path('cache/stats/', views.get_cache_stats, name='get_cache_stats'),
 ]
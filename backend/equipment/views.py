@@ -1,47 +1,63 @@
-import pandas as pd
-from django.http import HttpResponse
-from rest_framework.decorators import api_view, permission_classes
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import condition
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework import status
-from .models import EquipmentUpload
-from .serializers import EquipmentUploadSerializer
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-from io import BytesIO
+from .models import EquipmentUpload, UploadJob
+from .serializers import EquipmentUploadSerializer, UploadJobSerializer
+from .ingest import InvalidCSV, create_upload, file_digest
+from .storage import ColumnStore
+from .rows import parse_int, query_rows
+from .records import RECORD_FIELDS, aggregate_records, filter_records
+from .renderers import row_renderer_classes
+from .jsonstream import streaming_json_response
+from .reports import get_batch_pdfs, get_report_pdf, iter_zip, merge_pdfs
+from . import conditional
+from .jobs import schedule_prune, schedule_report_prerender, submit_upload_job
+from .sketches import DEFAULT_QUANTILES, merge_sketches
+from .stats import NUMERIC_COLUMNS
+from .trends import trend_buckets
+from .responsecache import cache_stats, cached_response
 
 
-REQUIRED_COLUMNS = ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']
+TRUE_VALUES = ('1', 'true', 'yes')
+COLUMNAR_FORMATS = ('columnar', 'arrow')
 
 
-def validate_csv(df):
-    """Validate that CSV has required columns."""
-    missing_columns = [col for col in REQUIRED_COLUMNS if col not in df.columns]
-    if missing_columns:
-        return False, f"Missing required columns: {', '.join(missing_columns)}"
-    return True, None
+def use_streaming(request, file):
+    """Decide whether an upload should be ingested in chunks."""
+    requested = request.query_params.get('stream', '').lower()
+    if requested:
+        return requested in TRUE_VALUES
+    return file.size > settings.EQUIPMENT_STREAMING_THRESHOLD
 
 
-def process_csv_data(df):
-    """Process CSV data and calculate statistics."""
-    # Calculate averages
-    avg_flowrate = df['Flowrate'].mean()
-    avg_pressure = df['Pressure'].mean()
-    avg_temperature = df['Temperature'].mean()
-    
-    # Calculate equipment type distribution
-    equipment_type_dist = df['Type'].value_counts().to_dict()
+def include_raw_data(request):
+    """Whether the client asked for ``raw_data`` in the response (default yes)."""
+    return request.query_params.get('raw_data', '1').lower() in TRUE_VALUES
+
+
+def rows_response(request, data, data_path, status_code=status.HTTP_200_OK):
+    """Respond with ``data`` plus every stored row under ``raw_data``.
     
-    return {
-        'avg_flowrate': round(avg_flowrate, 2),
-        'avg_pressure': round(avg_pressure, 2),
-        'avg_temperature': round(avg_temperature, 2),
-        'equipment_type_distribution': equipment_type_dist,
-        'total_records': len(df)
-    }
+    JSON clients get the rows streamed (and compressed when they accept it);
+    other renderers, such as the browsable API, get a regular response.
+    """
+    if request.accepted_renderer.format == 'json':
+        return streaming_json_response(request, data, 'raw_data', ColumnStore(data_path), status_code)
+    return Response(dict(data, raw_data=ColumnStore(data_path).records()), status=status_code)
+
+
+def json_error(request, message, status_code):
+    """Error response that is always JSON, even if a binary format was negotiated."""
+    request.accepted_renderer = JSONRenderer()
+    request.accepted_media_type = JSONRenderer.media_type
+    return Response({'error': message}, status=status_code)
 
 
 @api_view(['POST'])
@@ -57,55 +73,182 @@ def upload_csv(request):
         return Response({'error': 'File must be a CSV'}, status=status.HTTP_400_BAD_REQUEST)
     
     try:
-        # Read CSV file
-        df = pd.read_csv(file)
+        streaming = use_streaming(request, file)
+        # Normally hashed on arrival by ContentHashUploadHandler
+        content_hash = getattr(request, 'upload_digests', {}).get('file') or file_digest(file)
+        if request.query_params.get('async', '').lower() in TRUE_VALUES:
+            # Hand the file to a background worker and return immediately
+            job = submit_upload_job(file, streaming, content_hash)
+            response_data = UploadJobSerializer(job).data
+            response_data['status_url'] = request.build_absolute_uri(reverse('get_job', args=[job.id]))
+            return Response(response_data, status=status.HTTP_202_ACCEPTED)
         
-        # Validate CSV
-        is_valid, error_message = validate_csv(df)
-        if not is_valid:
-            return Response({'error': error_message}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Process data
-        stats = process_csv_data(df)
-        
-        # Create EquipmentUpload instance
-        upload = EquipmentUpload.objects.create(
-            filename=file.name,
-            avg_flowrate=stats['avg_flowrate'],
-            avg_pressure=stats['avg_pressure'],
-            avg_temperature=stats['avg_temperature'],
-            equipment_type_distribution=stats['equipment_type_distribution'],
-            total_records=stats['total_records']
-        )
-        
-        # Keep only last 5 uploads
-        uploads = EquipmentUpload.objects.order_by('-upload_timestamp')
-        if uploads.count() > 5:
-            for old_upload in uploads[5:]:
-                old_upload.delete()
+        upload, df = create_upload(file, file.name, streaming, content_hash=content_hash)
+        schedule_report_prerender(upload.id)
+        schedule_prune()
         
         # Return processed data for visualization
         serializer = EquipmentUploadSerializer(upload)
         response_data = serializer.data
-        response_data['raw_data'] = df.to_dict('records')
+        if include_raw_data(request):
+            # Rows are streamed from the stored columns, whatever the file size
+            return rows_response(request, response_data, upload.data_path, status.HTTP_201_CREATED)
         
         return Response(response_data, status=status.HTTP_201_CREATED)
         
+    except InvalidCSV as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+def get_job(request, job_id):
+    """Return the status of an asynchronous upload."""
+    try:
+        job = UploadJob.objects.select_related('upload').get(id=job_id)
+    except UploadJob.DoesNotExist:
+        return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(UploadJobSerializer(job).data, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@condition(etag_func=conditional.history_etag, last_modified_func=conditional.history_last_modified)
 def get_history(request):
     """Return summary of last 5 uploads."""
-    uploads = EquipmentUpload.objects.order_by('-upload_timestamp')[:5]
-    serializer = EquipmentUploadSerializer(uploads, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    history = cached_response('history', lambda: list(
+        EquipmentUploadSerializer(conditional.recent_uploads(), many=True).data
+    ))
+    return Response(history, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@condition(etag_func=conditional.upload_etag, last_modified_func=conditional.upload_last_modified)
+def get_upload(request, upload_id):
+    """Return the summary of one upload together with its stored rows."""
+    def build():
+        upload = EquipmentUpload.objects.get(id=upload_id)
+        return {'summary': dict(EquipmentUploadSerializer(upload).data), 'data_path': upload.data_path}
+    
+    try:
+        cached = cached_response(f'upload:{upload_id}', build)
+    except EquipmentUpload.DoesNotExist:
+        return Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    response_data = dict(cached['summary'])
+    if cached['data_path'] and include_raw_data(request):
+        return rows_response(request, response_data, cached['data_path'])
+    return Response(response_data, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@renderer_classes(row_renderer_classes())
+@condition(etag_func=conditional.upload_etag, last_modified_func=conditional.upload_last_modified)
+def get_upload_rows(request, upload_id):
+    """Return one page of an upload's stored rows.
+    
+    Rows are sent as JSON objects by default; clients can negotiate a
+    column-oriented JSON layout or an Arrow IPC stream through the Accept
+    header or ``?format=columnar`` / ``?format=arrow``.
+    """
+    try:
+        upload = EquipmentUpload.objects.get(id=upload_id)
+    except EquipmentUpload.DoesNotExist:
+        return json_error(request, 'Upload not found', status.HTTP_404_NOT_FOUND)
+    if not upload.data_path:
+        return json_error(request, 'No rows stored for this upload', status.HTTP_404_NOT_FOUND)
+    
+    columnar = request.accepted_renderer.format in COLUMNAR_FORMATS
+    store = ColumnStore(upload.data_path)
+    try:
+        max_limit = settings.EQUIPMENT_ROWS_MAX_COLUMNAR_PAGE_SIZE if columnar else None
+        indices, columns, page = query_rows(request.query_params, store, max_limit)
+    except ValueError as e:
+        return json_error(request, str(e), status.HTTP_400_BAD_REQUEST)
+    
+    page['columns'] = columns
+    if columnar:
+        page['data'] = {column: store.decode(column, indices) for column in columns}
+    else:
+        page['results'] = store.records(columns, indices)
+    return Response(page, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_records(request):
+    """Query individual rows of all uploads in the database.
+    
+    Filters (``upload``, ``since``/``until``, ``Type=Pump``,
+    ``Pressure__gte=7``, ...) are described in ``records.py``; ``offset`` and
+    ``limit`` page through the matches.
+    """
+    try:
+        records = filter_records(request.query_params)
+        limit = parse_int(request.query_params, 'limit', settings.EQUIPMENT_ROWS_PAGE_SIZE, minimum=1)
+        limit = min(limit, settings.EQUIPMENT_ROWS_MAX_PAGE_SIZE)
+        offset = parse_int(request.query_params, 'offset', 0)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'count': records.count(),
+        'offset': offset,
+        'limit': limit,
+        'results': list(records.values(*RECORD_FIELDS)[offset:offset + limit]),
+    })
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+def get_record_aggregates(request):
+    """Count, average, minimum and maximum per group, computed in SQL.
+    
+    Accepts the same filters as ``get_records``; ``?group_by=Type,upload``
+    chooses the groups (default ``Type``, empty for one overall row).
+    """
+    group_by = request.query_params.get('group_by', 'Type')
+    try:
+        records = filter_records(request.query_params)
+        results = aggregate_records(records, [key.strip() for key in group_by.split(',') if key.strip()])
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({'results': results})
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_trends(request):
+    """Average parameters per equipment type over time, across all uploads ever made.
+    
+    ``?interval=day|week|month`` sets the bucket size, ``?since`` /
+    ``?until`` (ISO dates) the range and ``?Type=Pump,Valve`` the types.
+    Only the rollup table is read, never the uploads or their rows.
+    """
+    dates = {}
+    for name in ('since', 'until'):
+        value = request.query_params.get(name)
+        if value:
+            dates[name] = parse_date(value)
+            if dates[name] is None:
+                return Response({'error': f"'{name}' must be an ISO date"},
+                                status=status.HTTP_400_BAD_REQUEST)
+    types = [value for value in request.query_params.get('Type', '').split(',') if value]
+    interval = request.query_params.get('interval', 'day')
+    try:
+        results = trend_buckets(interval, types=types, **dates)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({'interval': interval, 'results': results})
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@condition(etag_func=conditional.report_etag, last_modified_func=conditional.report_last_modified)
 def generate_report(request):
     """Generate PDF report based on analyzed data."""
     upload_id = request.GET.get('id')
@@ -124,90 +267,111 @@ def generate_report(request):
     
     upload = uploads[0]
     
-    # Create PDF
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    elements = []
-    
-    styles = getSampleStyleSheet()
-    title = Paragraph("Chemical Equipment Parameter Report", styles['Title'])
-    elements.append(title)
-    elements.append(Spacer(1, 0.2*inch))
-    
-    # File information
-    info_data = [
-        ['Filename:', upload.filename],
-        ['Upload Date:', upload.upload_timestamp.strftime('%Y-%m-%d %H:%M:%S')],
-        ['Total Records:', str(upload.total_records)],
-    ]
-    info_table = Table(info_data, colWidths=[2*inch, 4*inch])
-    info_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-        ('BACKGROUND', (1, 0), (1, -1), colors.beige),
-    ]))
-    elements.append(info_table)
-    elements.append(Spacer(1, 0.3*inch))
-    
-    # Summary statistics
-    stats_title = Paragraph("Summary Statistics", styles['Heading2'])
-    elements.append(stats_title)
-    elements.append(Spacer(1, 0.1*inch))
-    
-    stats_data = [
-        ['Parameter', 'Average Value'],
-        ['Flowrate', f"{upload.avg_flowrate}"],
-        ['Pressure', f"{upload.avg_pressure}"],
-        ['Temperature', f"{upload.avg_temperature}"],
-    ]
-    stats_table = Table(stats_data, colWidths=[3*inch, 3*inch])
-    stats_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-    ]))
-    elements.append(stats_table)
-    elements.append(Spacer(1, 0.3*inch))
-    
-    # Equipment type distribution
-    dist_title = Paragraph("Equipment Type Distribution", styles['Heading2'])
-    elements.append(dist_title)
-    elements.append(Spacer(1, 0.1*inch))
-    
-    dist_data = [['Equipment Type', 'Count']]
-    for eq_type, count in upload.equipment_type_distribution.items():
-        dist_data.append([eq_type, str(count)])
-    
-    dist_table = Table(dist_data, colWidths=[3*inch, 3*inch])
-    dist_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-    ]))
-    elements.append(dist_table)
-    
-    # Build PDF
-    doc.build(elements)
-    
-    # Get PDF content
-    pdf_content = buffer.getvalue()
-    buffer.close()
+    pdf_content = get_report_pdf(upload)
     
     # Return PDF as response
     response = HttpResponse(pdf_content, content_type='application/pdf')
     response['Content-Disposition'] = f'attachment; filename="equipment_report_{upload.id}.pdf"'
     return response
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def generate_batch_report(request):
+    """Generate reports for several uploads at once.
+    
+    ``?ids=1,2,3`` selects the uploads. Either way a comparison report and
+    each upload's own report are rendered in parallel; ``?output=zip`` (the
+    default) streams them as a ZIP, ``?output=pdf`` returns them merged
+    into one PDF.
+    """
+    try:
+        upload_ids = [int(value) for value in request.GET.get('ids', '').split(',') if value.strip()]
+    except ValueError:
+        return Response({'error': "'ids' must be a comma-separated list of upload ids"},
+                        status=status.HTTP_400_BAD_REQUEST)
+    if not upload_ids:
+        return Response({'error': 'No upload ids provided'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(upload_ids) > settings.EQUIPMENT_BATCH_REPORT_MAX_UPLOADS:
+        return Response({'error': f'At most {settings.EQUIPMENT_BATCH_REPORT_MAX_UPLOADS} uploads per batch'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    output = request.GET.get('output', 'zip')
+    if output not in ('zip', 'pdf'):
+        return Response({'error': "'output' must be 'zip' or 'pdf'"}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Oldest first, so the comparison reads as a timeline
+    uploads = list(EquipmentUpload.objects.filter(id__in=upload_ids).order_by('upload_timestamp'))
+    missing = sorted(set(upload_ids) - {upload.id for upload in uploads})
+    if missing:
+        return Response({'error': f"Uploads not found: {', '.join(map(str, missing))}"},
+                        status=status.HTTP_404_NOT_FOUND)
+    
+    comparison_pdf, report_pdfs = get_batch_pdfs(uploads)
+    if output == 'pdf':
+        response = HttpResponse(merge_pdfs([comparison_pdf] + report_pdfs), content_type='application/pdf')
+        response['Content-Disposition'] = 'attachment; filename="equipment_comparison_report.pdf"'
+        return response
+    
+    files = [('comparison_report.pdf', comparison_pdf)]
+    for upload, pdf_content in zip(uploads, report_pdfs):
+        files.append((f'equipment_report_{upload.id}.pdf', pdf_content))
+    response = StreamingHttpResponse(iter_zip(files), content_type='application/zip')
+    response['Content-Disposition'] = 'attachment; filename="equipment_reports.zip"'
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_quantiles(request):
+    """Approximate quantiles and histograms merged across uploads.
+    
+    Answered from the sketches stored with each upload, so no rows are read.
+    ``?ids=1,2,3`` selects the uploads (default: every retained upload),
+    ``?q=0.5,0.99`` the quantiles and ``?columns=Pressure`` the parameters.
+    """
+    try:
+        upload_ids = [int(value) for value in request.GET.get('ids', '').split(',') if value.strip()]
+    except ValueError:
+        return Response({'error': "'ids' must be a comma-separated list of upload ids"},
+                        status=status.HTTP_400_BAD_REQUEST)
+    try:
+        quantiles = [float(value) for value in request.GET.get('q', '').split(',') if value.strip()]
+    except ValueError:
+        return Response({'error': "'q' must be a comma-separated list of numbers"},
+                        status=status.HTTP_400_BAD_REQUEST)
+    quantiles = quantiles or DEFAULT_QUANTILES
+    if any(not 0 <= q <= 1 for q in quantiles):
+        return Response({'error': "Quantiles must be between 0 and 1"}, status=status.HTTP_400_BAD_REQUEST)
+    columns = [column.strip() for column in request.GET.get('columns', '').split(',') if column.strip()]
+    unknown = [column for column in columns if column not in NUMERIC_COLUMNS]
+    if unknown:
+        return Response({'error': f"Unknown columns: {', '.join(unknown)}"},
+                        status=status.HTTP_400_BAD_REQUEST)
+    
+    uploads = EquipmentUpload.objects.order_by('upload_timestamp')
+    if upload_ids:
+        uploads = uploads.filter(id__in=upload_ids)
+        missing = sorted(set(upload_ids) - {upload.id for upload in uploads})
+        if missing:
+            return Response({'error': f"Uploads not found: {', '.join(map(str, missing))}"},
+                            status=status.HTTP_404_NOT_FOUND)
+    # Uploads recorded before sketches existed cannot be merged
+    uploads = [upload for upload in uploads if upload.sketches]
+    if not uploads:
+        return Response({'error': 'No data available'}, status=status.HTTP_404_NOT_FOUND)
+    
+    try:
+        merged = merge_sketches(upload.sketches for upload in uploads)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+    return Response({
+        'uploads': [upload.id for upload in uploads],
+        'parameters': merged.summary(quantiles, columns or NUMERIC_COLUMNS),
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_cache_stats(request):
+    """Hit and miss counters of the response cache."""
+    return Response(cache_stats())
@@ -1,29 +1,840 @@
+import time
+STARTUP_BEGIN = time.perf_counter()
+
+import os
+import re
+import shutil
+import sqlite3
 import sys
-import requests
+import threading
+import uuid
+from collections import OrderedDict
+from io import BytesIO
+import numpy as np
+# requests and matplotlib load on first use, or in the background once the
+# window is up (see preload_modules); the Upload view needs neither
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QPushButton, QListWidget, QLabel, 
                              QFileDialog, QMessageBox, QTableWidget, QTableWidgetItem,
-                             QLineEdit, QHeaderView)
-from PyQt5.QtCore import Qt
+                             QTableView, QLineEdit, QHeaderView, QProgressBar, QStackedWidget)
+from PyQt5.QtCore import (Qt, QObject, QRunnable, QThreadPool, QAbstractTableModel,
+                          QModelIndex, QTimer, pyqtSignal)
 from PyQt5.QtGui import QFont
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
 import json
 
 
+class StartupTimer:
+    """Milestones of the application start, in seconds since main.py began loading.
+    
+    ``report`` prints them to stderr and, when the EQUIPMENT_STARTUP_REPORT
+    environment variable names a file, appends them to it as one JSON line
+    per start, so cold-start times can be compared between versions.
+    """
+    def __init__(self, begin):
+        self.begin = begin
+        self.milestones = OrderedDict()
+    
+    def mark(self, name):
+        self.milestones[name] = round(time.perf_counter() - self.begin, 4)
+    
+    def report(self):
+        sys.stderr.write("Startup: " + ", ".join(
+            f"{name} {seconds:.3f}s" for name, seconds in self.milestones.items()
+        ) + "\n")
+        path = os.environ.get('EQUIPMENT_STARTUP_REPORT')
+        if path:
+            record = {'time': time.time(), 'python': sys.version.split()[0],
+                      'milestones': self.milestones}
+            with open(path, 'a') as f:
+                f.write(json.dumps(record) + "\n")
+
+
+startup = StartupTimer(STARTUP_BEGIN)
+startup.mark('imports')
+
+
 API_BASE_URL = "http://localhost:8000/api"
-AUTH = ('admin', 'admin123')  # Basic authentication for API
+USERNAME = 'admin'
+PASSWORD = 'admin123'
+COLUMNS = ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']
+NUMERIC_COLUMNS = ['Flowrate', 'Pressure', 'Temperature']
+ROWS_PAGE_SIZE = 100000
+# (connect, read) seconds; uploads wait longer while the server parses the file
+API_TIMEOUT = (5, 60)
+UPLOAD_TIMEOUT = (5, 600)
+API_RETRIES = 3
+API_POOL_SIZE = 8
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.equipment-visualizer', 'datasets')
+CACHE_MAX_BYTES = 2 * 2**30
+# Scatter plots draw individual points only while this many are in view;
+# beyond that they show a 2D histogram re-binned to the visible area
+SCATTER_POINT_LIMIT = 20000
+SCATTER_BINS = 200
+SCATTER_REDRAW_MS = 100
+# Views built from MainWindow.current_data, rebuilt when it changes
+DATASET_VIEWS = ('dashboard', 'table')
+STAT_LABELS = [('count', 'Count'), ('mean', 'Mean'), ('min', 'Min'), ('max', 'Max'),
+               ('std', 'Std'), ('median', 'Median'), ('p95', 'P95')]
+
+
+class TokenAuth:
+    """requests auth hook sending an API token, exchanged once for the password.
+    
+    The server checks tokens without hashing a password on every request.
+    If the token is rejected (e.g. it was revoked) a new one is fetched and
+    the request is sent again once.
+    """
+    def __init__(self, client, username, password):
+        self.client = client
+        self.credentials = {'username': username, 'password': password}
+        self.token = None
+        self.lock = threading.Lock()
+    
+    def fetch_token(self):
+        response = self.client.request('POST', 'auth/token/', data=self.credentials, auth=None)
+        response.raise_for_status()
+        self.token = response.json()['token']
+    
+    def __call__(self, request):
+        with self.lock:
+            if self.token is None:
+                self.fetch_token()
+        request.headers['Authorization'] = f"Token {self.token}"
+        request.register_hook('response', self.handle_401)
+        return request
+    
+    def handle_401(self, response, **kwargs):
+        if response.status_code != 401 or response.request.headers.get('X-Token-Retry'):
+            return response
+        with self.lock:
+            self.fetch_token()
+        if hasattr(response.request.body, 'read'):
+            # A streamed body is consumed and cannot be sent again
+            return response
+        # Release the connection before reusing it for the retry
+        response.content
+        response.close()
+        retry = response.request.copy()
+        retry.headers['Authorization'] = f"Token {self.token}"
+        retry.headers['X-Token-Retry'] = '1'
+        retried = response.connection.send(retry, **kwargs)
+        retried.history.append(response)
+        retried.request = retry
+        return retried
+
+
+class MultipartFile:
+    """A file wrapped as a ``multipart/form-data`` body that is read lazily.
+    
+    requests sends file-like bodies block by block, so the file is never
+    held in memory; ``__len__`` supplies the Content-Length. ``progress`` is
+    called with ``(bytes_sent, total_bytes)`` after every block.
+    """
+    def __init__(self, field, path, progress=None):
+        self.boundary = uuid.uuid4().hex
+        filename = os.path.basename(path).replace('"', '')
+        head = (
+            f'--{self.boundary}\r\n'
+            f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+            'Content-Type: text/csv\r\n\r\n'
+        ).encode()
+        tail = f'\r\n--{self.boundary}--\r\n'.encode()
+        self.file = open(path, 'rb')
+        self.parts = [BytesIO(head), self.file, BytesIO(tail)]
+        self.length = len(head) + os.path.getsize(path) + len(tail)
+        self.sent = 0
+        self.progress = progress
+    
+    @property
+    def content_type(self):
+        return f'multipart/form-data; boundary={self.boundary}'
+    
+    def __len__(self):
+        return self.length
+    
+    def read(self, size=-1):
+        chunk = b''
+        while self.parts and (size is None or size < 0 or len(chunk) < size):
+            wanted = -1 if size is None or size < 0 else size - len(chunk)
+            data = self.parts[0].read(wanted)
+            if not data:
+                self.parts.pop(0)
+                continue
+            chunk += data
+        self.sent += len(chunk)
+        if self.progress:
+            self.progress(self.sent, self.length)
+        return chunk
+    
+    def close(self):
+        self.file.close()
+
+
+class ApiClient:
+    """Access to the backend API over one pooled, keep-alive session.
+    
+    Connections are reused across requests and worker threads. Idempotent
+    requests are retried with backoff on connection errors and gateway
+    errors; uploads are never retried since their body is streamed from
+    disk and cannot be replayed.
+    """
+    def __init__(self, base_url, username, password, timeout=API_TIMEOUT,
+                 retries=API_RETRIES, pool_size=API_POOL_SIZE):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.retries = retries
+        self.pool_size = pool_size
+        self.auth = TokenAuth(self, username, password)
+        self._session = None
+        self.session_lock = threading.Lock()
+    
+    @property
+    def session(self):
+        """The pooled session, created (and requests imported) on first use."""
+        with self.session_lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                from urllib3.util.retry import Retry
+                retry = Retry(total=self.retries, backoff_factor=0.5, status_forcelist=(502, 503, 504),
+                              allowed_methods=frozenset({'GET', 'HEAD'}))
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=retry)
+                session = requests.Session()
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._session = session
+            return self._session
+    
+    def url(self, path):
+        return f"{self.base_url}/{path.lstrip('/')}"
+    
+    def request(self, method, path, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        kwargs.setdefault('auth', self.auth)
+        return self.session.request(method, self.url(path), **kwargs)
+    
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+    
+    def upload(self, path, progress=None):
+        """POST the CSV at ``path`` to the upload endpoint, streaming it from disk."""
+        body = MultipartFile('file', path, progress=progress)
+        try:
+            return self.request(
+                'POST', 'upload/',
+                params={'raw_data': 0},
+                data=body,
+                headers={'Content-Type': body.content_type},
+                timeout=UPLOAD_TIMEOUT
+            )
+        finally:
+            body.close()
+
+
+api = ApiClient(API_BASE_URL, USERNAME, PASSWORD)
+
+
+class ConditionalCache:
+    """Local copies of GET responses, revalidated with ETag / Last-Modified.
+    
+    Unchanged resources come back from the server as an empty 304 and are
+    served from the copy kept here. Only the most recent entries are kept.
+    """
+    def __init__(self, client, max_entries=16):
+        self.client = client
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        # Used from worker threads
+        self.lock = threading.Lock()
+    
+    def get_json(self, path, params=None):
+        """Return ``(data, changed)`` for a GET of the API ``path``."""
+        key = (path, tuple(sorted((params or {}).items())))
+        with self.lock:
+            cached = self.entries.get(key)
+        headers = {}
+        if cached:
+            if cached['etag']:
+                headers['If-None-Match'] = cached['etag']
+            if cached['last_modified']:
+                headers['If-Modified-Since'] = cached['last_modified']
+        response = self.client.get(path, params=params, headers=headers)
+        if response.status_code == 304 and cached:
+            with self.lock:
+                if key in self.entries:
+                    self.entries.move_to_end(key)
+            return json.loads(cached['content']), False
+        response.raise_for_status()
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if etag or last_modified:
+            with self.lock:
+                self.entries[key] = {
+                    'etag': etag,
+                    'last_modified': last_modified,
+                    'content': response.content,
+                }
+                self.entries.move_to_end(key)
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+        return response.json(), True
+
+
+http_cache = ConditionalCache(api)
+
+
+def fetch_columns(upload_id):
+    """Download the stored rows of an upload as a dict of numpy arrays.
+    
+    Uses the column-oriented JSON format so each page decodes straight into
+    one array per column instead of one dict per row. Pages are fetched
+    directly rather than through ``http_cache``: the rows end up in the
+    ``DatasetCache`` on disk, so keeping them in memory too would only
+    duplicate them.
+    """
+    parts = {}
+    cursor = None
+    while True:
+        params = {'format': 'columnar', 'limit': ROWS_PAGE_SIZE}
+        if cursor:
+            params['cursor'] = cursor
+        response = api.get(f"uploads/{upload_id}/rows/", params=params)
+        response.raise_for_status()
+        page = response.json()
+        for name, values in page['data'].items():
+            dtype = float if name in NUMERIC_COLUMNS else object
+            parts.setdefault(name, []).append(np.array(values, dtype=dtype))
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+    return {name: np.concatenate(arrays) for name, arrays in parts.items()}
+
+
+class DatasetCache:
+    """Datasets opened before, kept on disk so they open without the backend.
+    
+    An SQLite index lists every cached upload by id with its content hash,
+    summary, size and last use. The rows live next to it as one ``.npy``
+    file per column. A hash that no longer matches the server's (e.g. after
+    its database was reset) discards the entry. The least recently used
+    datasets are evicted once the total exceeds ``max_bytes``. The history
+    list is kept as well so it can be shown while the backend is down.
+    """
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        # Used from worker threads, one statement at a time
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(os.path.join(directory, 'cache.sqlite3'), check_same_thread=False)
+        with self.db:
+            self.db.execute(
+                'CREATE TABLE IF NOT EXISTS datasets ('
+                'upload_id INTEGER PRIMARY KEY, content_hash TEXT, summary TEXT NOT NULL, '
+                'columns TEXT NOT NULL, bytes INTEGER NOT NULL, last_used REAL NOT NULL)'
+            )
+            self.db.execute(
+                'CREATE TABLE IF NOT EXISTS documents (name TEXT PRIMARY KEY, content TEXT NOT NULL)'
+            )
+    
+    def dataset_dir(self, upload_id):
+        return os.path.join(self.directory, str(upload_id))
+    
+    def get(self, upload_id, content_hash=None):
+        """Return the cached dataset of an upload, or None.
+        
+        With ``content_hash`` given, an entry holding other content is dropped.
+        """
+        with self.lock:
+            row = self.db.execute(
+                'SELECT content_hash, summary, columns FROM datasets WHERE upload_id = ?', (upload_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        cached_hash, summary, names = row
+        if content_hash and cached_hash != content_hash:
+            self.delete(upload_id)
+            return None
+        try:
+            columns = {}
+            for position, name in enumerate(json.loads(names)):
+                values = np.load(os.path.join(self.dataset_dir(upload_id), f'{position}.npy'))
+                if name not in NUMERIC_COLUMNS:
+                    values = values.astype(object)
+                    values[values == ''] = None
+                columns[name] = values
+        except (OSError, ValueError):
+            # Files removed or damaged behind our back
+            self.delete(upload_id)
+            return None
+        with self.lock, self.db:
+            self.db.execute('UPDATE datasets SET last_used = ? WHERE upload_id = ?', (time.time(), upload_id))
+        return dict(json.loads(summary), columns=columns)
+    
+    def put(self, data):
+        """Store a dataset with ``columns``, then evict down to ``max_bytes``."""
+        columns = data.get('columns')
+        if 'id' not in data or not columns:
+            return
+        upload_id = data['id']
+        target = self.dataset_dir(upload_id)
+        staging = f'{target}.{uuid.uuid4().hex}.tmp'
+        os.makedirs(staging)
+        size = 0
+        for position, (name, values) in enumerate(columns.items()):
+            path = os.path.join(staging, f'{position}.npy')
+            # Strings are saved as fixed-width text so the files never need
+            # pickle, missing ones as '' (the server stores them that way too)
+            if name not in NUMERIC_COLUMNS:
+                values = np.array(['' if value is None else str(value) for value in values], dtype=str)
+            np.save(path, values)
+            size += os.path.getsize(path)
+        summary = {key: value for key, value in data.items() if key not in ('columns', 'raw_data')}
+        
+        with self.lock:
+            shutil.rmtree(target, ignore_errors=True)
+            os.replace(staging, target)
+            with self.db:
+                self.db.execute(
+                    'INSERT OR REPLACE INTO datasets VALUES (?, ?, ?, ?, ?, ?)',
+                    (upload_id, data.get('content_hash'), json.dumps(summary),
+                     json.dumps(list(columns)), size, time.time())
+                )
+        self.evict(keep=upload_id)
+    
+    def evict(self, keep=None):
+        with self.lock:
+            rows = self.db.execute(
+                'SELECT upload_id, bytes FROM datasets ORDER BY last_used DESC'
+            ).fetchall()
+        used = 0
+        for upload_id, size in rows:
+            used += size
+            if used > self.max_bytes and upload_id != keep:
+                self.delete(upload_id)
+    
+    def delete(self, upload_id):
+        with self.lock:
+            with self.db:
+                self.db.execute('DELETE FROM datasets WHERE upload_id = ?', (upload_id,))
+            shutil.rmtree(self.dataset_dir(upload_id), ignore_errors=True)
+    
+    def save_document(self, name, content):
+        with self.lock, self.db:
+            self.db.execute('INSERT OR REPLACE INTO documents VALUES (?, ?)', (name, json.dumps(content)))
+    
+    def load_document(self, name):
+        with self.lock:
+            row = self.db.execute('SELECT content FROM documents WHERE name = ?', (name,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+
+dataset_cache = DatasetCache()
+
+
+def load_upload(task, summary):
+    """Return an upload's summary with its rows, from the local cache if possible."""
+    data = dataset_cache.get(summary['id'], summary.get('content_hash'))
+    if data is not None:
+        return data
+    data = dict(summary, columns=fetch_columns(summary['id']))
+    dataset_cache.put(data)
+    return data
+
+
+def load_history(task):
+    """Return ``(history, changed, offline)``, falling back to the last copy seen."""
+    import requests
+    try:
+        history, changed = http_cache.get_json("history/")
+    except requests.RequestException:
+        history = dataset_cache.load_document('history')
+        if history is None:
+            raise
+        return history, True, True
+    if changed:
+        dataset_cache.save_document('history', history)
+    return history, changed, False
+
+
+def preload_modules(task):
+    """Import the networking and charting modules ahead of their first use."""
+    api.session
+    import matplotlib.backends.backend_qt5agg  # noqa: F401
+    import matplotlib.colors  # noqa: F401
+    import matplotlib.figure  # noqa: F401
+
+
+def upload_csv(task, path):
+    """Upload a CSV and download its stored rows; runs on a worker thread."""
+    response = api.upload(path, progress=task.report_progress)
+    task.check_cancelled()
+    if response.status_code != 201:
+        raise RuntimeError(response.json().get('error', 'Upload failed'))
+    data = response.json()
+    if data.get('has_rows'):
+        data['columns'] = fetch_columns(data['id'])
+        dataset_cache.put(data)
+    task.check_cancelled()
+    return data
+
+
+class TaskCancelled(Exception):
+    """Raised inside a task once the user has cancelled it."""
+
+
+class TaskSignals(QObject):
+    # Byte counts can exceed 32 bits, so they travel as Python objects
+    progress = pyqtSignal(object, object)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+
+class Task(QRunnable):
+    """Run ``func(task, *args)`` on a thread pool, reporting back through signals.
+    
+    The signals are delivered on the GUI thread, so connected slots may
+    update widgets. ``func`` calls ``report_progress`` / ``check_cancelled``
+    to publish progress and to stop early once ``cancel()`` was called.
+    """
+    def __init__(self, func, *args):
+        super().__init__()
+        self.func = func
+        self.args = args
+        self.signals = TaskSignals()
+        self._cancelled = threading.Event()
+        self._reported = 0
+    
+    def cancel(self):
+        self._cancelled.set()
+    
+    def is_cancelled(self):
+        return self._cancelled.is_set()
+    
+    def check_cancelled(self):
+        if self.is_cancelled():
+            raise TaskCancelled()
+    
+    def report_progress(self, done, total):
+        self.check_cancelled()
+        # Called for every block sent; forward roughly every half percent
+        if done >= total or done - self._reported >= total / 200:
+            self._reported = done
+            self.signals.progress.emit(done, total)
+    
+    def run(self):
+        try:
+            result = self.func(self, *self.args)
+        except Exception as e:
+            # Cancelling mid-request may surface as any network error
+            if self.is_cancelled():
+                self.signals.cancelled.emit()
+            else:
+                self.signals.failed.emit(str(e))
+        else:
+            if self.is_cancelled():
+                self.signals.cancelled.emit()
+            else:
+                self.signals.finished.emit(result)
+
+
+def format_stat(value):
+    if value is None:
+        return "-"
+    return str(value) if isinstance(value, int) else f"{value:.2f}"
+
+
+def columns_from_data(data):
+    """Return one numpy array per column for a dataset holding either columns or raw_data."""
+    columns = data.get('columns')
+    if columns:
+        return columns
+    raw_data = data.get('raw_data') or []
+    if not raw_data:
+        return {}
+    return {
+        name: np.array([item.get(name) for item in raw_data],
+                       dtype=float if name in NUMERIC_COLUMNS else object)
+        for name in COLUMNS
+    }
+
+
+class ColumnTableModel(QAbstractTableModel):
+    """Table model over numpy column arrays.
+    
+    Cells are formatted only when the view paints them, so the cost of a
+    dataset is its arrays, not one item per cell. The view shows the rows
+    listed in ``self.rows``; sorting permutes that index array using an
+    argsort computed once per column and kept for later sorts.
+    """
+    def __init__(self, columns, parent=None):
+        super().__init__(parent)
+        self.names = [name for name in COLUMNS if name in columns]
+        self.columns = columns
+        self.row_total = len(columns[self.names[0]]) if self.names else 0
+        self.sort_indexes = {}
+        # A SearchIndex, once built, supplies ready-made sort keys
+        self.search_index = None
+        self.order = None
+        self.selected = None
+        self.rows = np.arange(self.row_total)
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.names)
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        name = self.names[index.column()]
+        if role == Qt.DisplayRole:
+            value = self.columns[name][self.rows[index.row()]]
+            if name in NUMERIC_COLUMNS:
+                return '' if np.isnan(value) else str(value)
+            return '' if value is None else str(value)
+        if role == Qt.TextAlignmentRole and name in NUMERIC_COLUMNS:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+    
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.names[section]
+        return str(section + 1)
+    
+    def sort_index(self, name):
+        """Row numbers of the full dataset in ascending order of ``name``."""
+        if name not in self.sort_indexes:
+            values = self.columns[name]
+            if self.search_index is not None:
+                values = self.search_index.codes[name]
+            elif values.dtype == object:
+                # Sort the distinct strings once, then the integer codes
+                _, codes = np.unique(values.astype(str), return_inverse=True)
+                values = codes
+            self.sort_indexes[name] = np.argsort(values, kind='stable')
+        return self.sort_indexes[name]
+    
+    def sort(self, column, order=Qt.AscendingOrder):
+        if not self.names:
+            return
+        self.layoutAboutToBeChanged.emit()
+        index = self.sort_index(self.names[column])
+        self.order = index[::-1] if order == Qt.DescendingOrder else index
+        self.update_rows()
+        self.layoutChanged.emit()
+    
+    def set_selection(self, selected):
+        """Show only the rows where the boolean mask ``selected`` is set (None shows all)."""
+        self.beginResetModel()
+        self.selected = selected
+        self.update_rows()
+        self.endResetModel()
+    
+    def update_rows(self):
+        rows = self.order if self.order is not None else np.arange(self.row_total)
+        if self.selected is not None:
+            rows = rows[self.selected[rows]]
+        self.rows = rows
+
+
+SEARCH_DELAY_MS = 250
+# Column names accepted in scoped search terms such as ``type:pump``
+SEARCH_COLUMNS = {
+    'name': 'Equipment Name',
+    'equipmentname': 'Equipment Name',
+    'type': 'Type',
+    'flowrate': 'Flowrate',
+    'pressure': 'Pressure',
+    'temperature': 'Temperature',
+}
+SEARCH_TERM = re.compile(r'(?P<column>[a-z]+)(?P<op><=|>=|<|>|=|:)(?P<value>.+)')
+# Every character that can appear in a formatted float
+NUMBER_CHARS = set('0123456789.-+einaf')
+
+
+def _parse_number(text):
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def parse_query(query):
+    """Split a search query into terms that all have to match.
+    
+    Words match any column. ``column:text`` matches within one column,
+    ``column=value`` matches it exactly and, for numeric columns,
+    ``column>value`` (also ``>=``, ``<``, ``<=``) or ``column:low..high``
+    select a range. Anything else is searched for as text.
+    """
+    terms = []
+    for token in query.lower().split():
+        match = SEARCH_TERM.fullmatch(token)
+        column = SEARCH_COLUMNS.get(match['column']) if match else None
+        if column is None:
+            terms.append(('text', None, token))
+            continue
+        op, value = match['op'], match['value']
+        if column in NUMERIC_COLUMNS:
+            low, dots, high = value.partition('..')
+            if op == ':' and dots:
+                bounds = (_parse_number(low) if low else -np.inf, _parse_number(high) if high else np.inf)
+                if None not in bounds:
+                    terms.append(('range', column, bounds[0], bounds[1], True, True))
+                    continue
+            elif op != ':' and _parse_number(value) is not None:
+                number = _parse_number(value)
+                terms.append({
+                    '=': ('range', column, number, number, True, True),
+                    '>': ('range', column, number, np.inf, False, True),
+                    '>=': ('range', column, number, np.inf, True, True),
+                    '<': ('range', column, -np.inf, number, True, False),
+                    '<=': ('range', column, -np.inf, number, True, True),
+                }[op])
+                continue
+            if op != ':':
+                terms.append(('text', None, token))
+                continue
+        elif op not in (':', '='):
+            terms.append(('text', None, token))
+            continue
+        terms.append(('equals' if op == '=' else 'text', column, value))
+    return terms
+
+
+def _implies(term, other):
+    """Whether rows matching ``term`` always match ``other`` too."""
+    if term[:2] != other[:2]:
+        return False
+    if term[0] == 'text':
+        return other[2] in term[2]
+    if term[0] == 'equals':
+        return term[2] == other[2]
+    _, _, low, high, low_closed, high_closed = term
+    _, _, other_low, other_high, other_low_closed, other_high_closed = other
+    above = low > other_low or (low == other_low and (other_low_closed or not low_closed))
+    below = high < other_high or (high == other_high and (other_high_closed or not high_closed))
+    return above and below
+
+
+def query_narrows(terms, previous):
+    """Whether the results of ``terms`` are a subset of those of ``previous``."""
+    return all(any(_implies(term, old) for term in terms) for old in previous)
+
+
+class SearchIndex:
+    """Search structures for a dataset, built once when the table opens.
+    
+    Every column is reduced to its sorted distinct values plus one integer
+    code per row; the codes double as sort keys for the table. A text term
+    is matched against the lower-cased distinct values only and mapped back
+    to rows through the codes, so repeated names and types cost nothing.
+    Range terms compare the numeric arrays directly. Numbers are formatted
+    for text search only once a query needs it.
+    """
+    def __init__(self, columns):
+        self.columns = columns
+        self.names = [name for name in COLUMNS if name in columns]
+        self.row_total = len(columns[self.names[0]]) if self.names else 0
+        self.distinct = {}
+        self.codes = {}
+        self.text = {}
+        self.lock = threading.Lock()
+        for name in self.names:
+            values = columns[name]
+            if name in NUMERIC_COLUMNS:
+                self.distinct[name], self.codes[name] = np.unique(values, return_inverse=True)
+            else:
+                distinct, self.codes[name] = np.unique(values.astype(str), return_inverse=True)
+                self.text[name] = np.array([value.lower() for value in distinct.tolist()])
+    
+    def column_text(self, name):
+        """Distinct values of a column as displayed and lower-cased."""
+        with self.lock:
+            if name not in self.text:
+                distinct = self.distinct[name]
+                text = distinct.astype(str)
+                # Missing numbers show as empty cells
+                text[np.isnan(distinct)] = ''
+                self.text[name] = text
+            return self.text[name]
+    
+    def match_text(self, name, needle, rows, exact=False):
+        """Mask over ``rows`` of the rows whose ``name`` column contains ``needle``."""
+        if name in NUMERIC_COLUMNS and not set(needle) <= NUMBER_CHARS:
+            return np.zeros(len(rows), dtype=bool)
+        text = self.column_text(name)
+        codes = self.codes[name][rows]
+        if len(codes) < len(text):
+            # Few candidate rows left: only test the values they use
+            used = np.unique(codes)
+            hits = np.zeros(len(text), dtype=bool)
+            hits[used] = text[used] == needle if exact else np.char.find(text[used], needle) != -1
+        else:
+            hits = text == needle if exact else np.char.find(text, needle) != -1
+        return hits[codes]
+    
+    def match(self, term, rows):
+        kind, name = term[:2]
+        if kind == 'range':
+            _, _, low, high, low_closed, high_closed = term
+            values = self.columns[name][rows]
+            above = values >= low if low_closed else values > low
+            below = values <= high if high_closed else values < high
+            return above & below
+        if name is None:
+            selected = np.zeros(len(rows), dtype=bool)
+            for column in self.names:
+                selected |= self.match_text(column, term[2], rows)
+            return selected
+        return self.match_text(name, term[2], rows, exact=kind == 'equals')
+    
+    def search(self, terms, within=None, check_cancelled=None):
+        """Boolean row mask of the rows matching all ``terms``.
+        
+        ``within`` is an earlier result known to contain every match; only
+        its rows are examined. ``check_cancelled`` is called between terms.
+        """
+        rows = np.arange(self.row_total) if within is None else np.flatnonzero(within)
+        for term in terms:
+            if not len(rows):
+                break
+            if check_cancelled:
+                check_cancelled()
+            rows = rows[self.match(term, rows)]
+        selected = np.zeros(self.row_total, dtype=bool)
+        selected[rows] = True
+        return selected
 
 
 class MatplotlibWidget(QWidget):
     """Widget to display matplotlib charts."""
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, toolbar=False):
         super().__init__(parent)
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+        from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
+        from matplotlib.figure import Figure
         self.figure = Figure(figsize=(8, 6))
         self.canvas = FigureCanvas(self.figure)
         layout = QVBoxLayout()
+        if toolbar:
+            layout.addWidget(NavigationToolbar(self.canvas, self))
         layout.addWidget(self.canvas)
         self.setLayout(layout)
+        
+        # Scatter plot state, see plot_scatter
+        self.scatter_ax = None
+        self.background = None
+        self.canvas.mpl_connect('draw_event', self.on_draw)
+        self.redraw_timer = QTimer(self)
+        self.redraw_timer.setSingleShot(True)
+        self.redraw_timer.setInterval(SCATTER_REDRAW_MS)
+        self.redraw_timer.timeout.connect(self.update_scatter)
     
     def plot_bar_chart(self, data):
         """Plot equipment type distribution bar chart."""
@@ -49,17 +860,98 @@ class MatplotlibWidget(QWidget):
         self.canvas.draw()
     
     def plot_scatter(self, x_data, y_data, x_label, y_label, title):
-        """Plot scatter chart."""
+        """Plot scatter chart.
+        
+        Points are drawn individually while at most ``SCATTER_POINT_LIMIT``
+        are in view, otherwise as a 2D histogram of the visible area. Both
+        artists are created once; zooming or panning updates their data and
+        redraws just them over the cached axes background.
+        """
+        from matplotlib.colors import LogNorm
         self.figure.clear()
+        self.scatter_ax = None
+        self.background = None
         ax = self.figure.add_subplot(111)
-        
-        ax.scatter(x_data, y_data, alpha=0.6, color='#667eea', s=50)
         ax.set_xlabel(x_label, fontsize=12, fontweight='bold')
         ax.set_ylabel(y_label, fontsize=12, fontweight='bold')
         ax.set_title(title, fontsize=14, fontweight='bold')
         ax.grid(True, alpha=0.3)
         
+        x = np.asarray(x_data, dtype=float)
+        y = np.asarray(y_data, dtype=float)
+        present = ~(np.isnan(x) | np.isnan(y))
+        x, y = x[present], y[present]
+        if not len(x):
+            self.canvas.draw()
+            return
+        
+        # Sorted by x, the points in view are one slice filtered on y
+        order = np.argsort(x, kind='stable')
+        self.scatter_x, self.scatter_y = x[order], y[order]
+        self.points = ax.scatter([], [], alpha=0.6, color='#667eea', s=50, animated=True)
+        self.density = ax.imshow(
+            np.zeros((1, 1)), origin='lower', aspect='auto', cmap='viridis',
+            norm=LogNorm(), interpolation='nearest', animated=True,
+        )
+        ax.set_xlim(*self.padded(x[order[0]], x[order[-1]]))
+        ax.set_ylim(*self.padded(y.min(), y.max()))
+        ax.callbacks.connect('xlim_changed', lambda ax: self.redraw_timer.start())
+        ax.callbacks.connect('ylim_changed', lambda ax: self.redraw_timer.start())
+        self.scatter_ax = ax
+        self.update_scatter(blit=False)
         self.canvas.draw()
+    
+    @staticmethod
+    def padded(low, high):
+        margin = (high - low) * 0.05 or 0.5
+        return low - margin, high + margin
+    
+    def update_scatter(self, blit=True):
+        """Show the points or the histogram for the area currently in view."""
+        ax = self.scatter_ax
+        if ax is None:
+            return
+        (x0, x1), (y0, y1) = sorted(ax.get_xlim()), sorted(ax.get_ylim())
+        start = np.searchsorted(self.scatter_x, x0, side='left')
+        stop = np.searchsorted(self.scatter_x, x1, side='right')
+        xs, ys = self.scatter_x[start:stop], self.scatter_y[start:stop]
+        in_view = (ys >= y0) & (ys <= y1)
+        xs, ys = xs[in_view], ys[in_view]
+        
+        if len(xs) <= SCATTER_POINT_LIMIT:
+            self.points.set_offsets(np.column_stack([xs, ys]))
+            self.points.set_visible(True)
+            self.density.set_visible(False)
+        else:
+            counts, _, _ = np.histogram2d(xs, ys, bins=SCATTER_BINS, range=[[x0, x1], [y0, y1]])
+            self.density.set_data(np.ma.masked_equal(counts.T, 0))
+            self.density.set_extent((x0, x1, y0, y1))
+            self.density.set_clim(1, max(counts.max(), 2))
+            self.density.set_visible(True)
+            self.points.set_visible(False)
+        if blit:
+            self.blit_scatter()
+    
+    def on_draw(self, event):
+        # A full draw leaves out the animated artists: keep that as the
+        # background and paint them on top
+        if self.scatter_ax is None:
+            return
+        self.background = self.canvas.copy_from_bbox(self.scatter_ax.bbox)
+        self.draw_scatter_artists()
+    
+    def blit_scatter(self):
+        if self.background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self.background)
+        self.draw_scatter_artists()
+    
+    def draw_scatter_artists(self):
+        for artist in (self.density, self.points):
+            if artist.get_visible():
+                self.scatter_ax.draw_artist(artist)
+        self.canvas.blit(self.scatter_ax.bbox)
 
 
 class UploadWidget(QWidget):
@@ -108,30 +1000,12 @@ class UploadWidget(QWidget):
         if not file_path:
             return
         
-        self.status_label.setText("Uploading...")
-        self.status_label.setStyleSheet("color: blue;")
-        
-        try:
-            with open(file_path, 'rb') as f:
-                files = {'file': f}
-                response = requests.post(
-                    f"{API_BASE_URL}/upload/",
-                    files=files,
-                    auth=AUTH
-                )
-            
-            if response.status_code == 201:
-                data = response.json()
-                self.status_label.setText(f"Upload successful! Processed {data.get('total_records', 0)} records.")
-                self.status_label.setStyleSheet("color: green;")
-                self.main_window.refresh_history()
-                self.main_window.switch_to_dashboard(data)
-            else:
-                error_msg = response.json().get('error', 'Upload failed')
-                self.status_label.setText(f"Error: {error_msg}")
-                self.status_label.setStyleSheet("color: red;")
-        except Exception as e:
-            self.status_label.setText(f"Error: {str(e)}")
+        if self.main_window.start_upload(file_path):
+            # The upload runs in the background; other views stay usable
+            self.status_label.setText("Uploading... Progress is shown in the status bar.")
+            self.status_label.setStyleSheet("color: blue;")
+        else:
+            self.status_label.setText("Another upload is still in progress.")
             self.status_label.setStyleSheet("color: red;")
 
 
@@ -188,11 +1062,16 @@ class DashboardWidget(QWidget):
         charts_layout.addWidget(bar_widget)
         
         # Scatter plot
-        scatter_widget = MatplotlibWidget()
+        scatter_widget = MatplotlibWidget(toolbar=True)
+        columns = self.data.get('columns')
         raw_data = self.data.get('raw_data', [])
-        if raw_data:
+        if columns:
+            pressures = columns['Pressure']
+            flowrates = columns['Flowrate']
+        else:
             pressures = [item.get('Pressure', 0) for item in raw_data]
             flowrates = [item.get('Flowrate', 0) for item in raw_data]
+        if len(pressures):
             scatter_widget.plot_scatter(
                 pressures, flowrates,
                 "Pressure", "Flowrate",
@@ -201,6 +1080,29 @@ class DashboardWidget(QWidget):
         charts_layout.addWidget(scatter_widget)
         
         layout.addLayout(charts_layout)
+        
+        # Per-type statistics
+        by_type = self.data.get('parameter_stats', {}).get('by_type', {})
+        if by_type:
+            stats_title = QLabel("Statistics by Equipment Type")
+            stats_title.setFont(QFont("Arial", 12, QFont.Bold))
+            layout.addWidget(stats_title)
+            
+            headers = ["Type", "Parameter"] + [label for _, label in STAT_LABELS]
+            type_table = QTableWidget(len(by_type) * len(NUMERIC_COLUMNS), len(headers))
+            type_table.setHorizontalHeaderLabels(headers)
+            type_table.verticalHeader().setVisible(False)
+            row = 0
+            for eq_type, parameters in by_type.items():
+                for parameter in NUMERIC_COLUMNS:
+                    values = parameters[parameter]
+                    cells = [eq_type, parameter] + [format_stat(values[stat]) for stat, _ in STAT_LABELS]
+                    for col, value in enumerate(cells):
+                        type_table.setItem(row, col, QTableWidgetItem(value))
+                    row += 1
+            type_table.resizeColumnsToContents()
+            layout.addWidget(type_table)
+        
         self.setLayout(layout)
 
 
@@ -232,28 +1134,48 @@ class HistoryWidget(QWidget):
         self.setLayout(layout)
     
     def load_history(self):
-        try:
-            response = requests.get(f"{API_BASE_URL}/history/", auth=AUTH)
-            if response.status_code == 200:
-                history = response.json()
-                self.history_list.clear()
-                for item in history:
-                    text = f"{item['filename']} - {item['upload_timestamp']} ({item['total_records']} records)"
-                    self.history_list.addItem(text)
-                    self.history_list.item(self.history_list.count() - 1).setData(Qt.UserRole, item)
-        except Exception as e:
-            QMessageBox.warning(self, "Error", f"Failed to load history: {str(e)}")
+        self.main_window.run_task(
+            load_history,
+            on_finished=self.show_history,
+            on_failed=lambda error: self.main_window.show_error(f"Failed to load history: {error}"),
+        )
+    
+    def show_history(self, result):
+        history, changed, offline = result
+        if offline:
+            self.main_window.statusBar().showMessage("Backend unreachable; showing the last history loaded.", 10000)
+        if not changed and self.history_list.count():
+            # Server answered 304 and the list already shows this history
+            return
+        self.history_list.clear()
+        for item in history:
+            text = f"{item['filename']} - {item['upload_timestamp']} ({item['total_records']} records)"
+            self.history_list.addItem(text)
+            self.history_list.item(self.history_list.count() - 1).setData(Qt.UserRole, item)
     
     def on_item_double_clicked(self, item):
         data = item.data(Qt.UserRole)
-        if data:
-            self.main_window.switch_to_dashboard(data)
+        if not data:
+            return
+        main_window = self.main_window
+        if not data.get('has_rows'):
+            main_window.switch_to_dashboard(data)
+            return
+        # History only carries summaries; read the rows from the local cache
+        # or fetch them in the background
+        main_window.statusBar().showMessage(f"Loading {data['filename']}...")
+        main_window.run_task(
+            load_upload, data,
+            on_finished=main_window.switch_to_dashboard,
+            on_failed=lambda error: main_window.show_error(f"Failed to load upload data: {error}"),
+        )
 
 
 class DataTableWidget(QWidget):
     """Widget for displaying data table."""
     def __init__(self, data, parent=None):
         super().__init__(parent)
+        self.main_window = parent
         self.data = data
         self.init_ui()
     
@@ -269,53 +1191,91 @@ class DataTableWidget(QWidget):
         search_layout = QHBoxLayout()
         search_label = QLabel("Search:")
         self.search_input = QLineEdit()
-        self.search_input.textChanged.connect(self.filter_table)
+        self.search_input.setPlaceholderText("e.g. pump type:valve flowrate>100 pressure:2..5")
+        self.search_input.setToolTip(
+            "Words match any column. Restrict a word to a column with name:, type:, flowrate:, "
+            "pressure: or temperature:; use = for an exact value.\n"
+            "Numeric columns also take >, >=, <, <= and ranges such as pressure:2..5."
+        )
+        # Search once typing pauses rather than on every keystroke
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DELAY_MS)
+        self.search_timer.timeout.connect(self.filter_table)
+        self.search_input.textChanged.connect(self.search_timer.start)
+        self.count_label = QLabel()
         search_layout.addWidget(search_label)
         search_layout.addWidget(self.search_input)
+        search_layout.addWidget(self.count_label)
         layout.addLayout(search_layout)
         
         # Table
-        self.table = QTableWidget()
-        raw_data = self.data.get('raw_data', [])
-        if raw_data:
-            columns = ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']
-            self.table.setColumnCount(len(columns))
-            self.table.setHorizontalHeaderLabels(columns)
-            self.table.setRowCount(len(raw_data))
-            
-            for row, item in enumerate(raw_data):
-                for col, col_name in enumerate(columns):
-                    value = item.get(col_name, '')
-                    self.table.setItem(row, col, QTableWidgetItem(str(value)))
-            
-            self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-            self.original_data = raw_data
+        columns = columns_from_data(self.data)
+        self.model = ColumnTableModel(columns, self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        # Start in upload order; enabling sorting would otherwise sort by column 0
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.table.setSortingEnabled(True)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        # Fixed row heights keep the view from measuring every row
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
         
         layout.addWidget(self.table)
         self.setLayout(layout)
+        
+        self.search_index = None
+        self.search_task = None
+        self.last_terms = []
+        self.last_selection = None
+        self.update_count()
+        self.main_window.run_task(lambda task: SearchIndex(columns), on_finished=self.set_search_index)
+    
+    def set_search_index(self, index):
+        self.search_index = index
+        self.model.search_index = index
+        if self.search_input.text().strip():
+            self.filter_table()
+    
+    def update_count(self, text=None):
+        if text is None:
+            text = f"{len(self.model.rows):,} of {self.model.row_total:,} rows"
+        self.count_label.setText(text)
     
     def filter_table(self):
-        search_term = self.search_input.text().lower()
-        raw_data = getattr(self, 'original_data', self.data.get('raw_data', []))
-        
-        if not search_term:
-            self.table.setRowCount(len(raw_data))
-            for row, item in enumerate(raw_data):
-                for col, col_name in enumerate(['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']):
-                    value = item.get(col_name, '')
-                    self.table.setItem(row, col, QTableWidgetItem(str(value)))
+        if self.search_task is not None:
+            self.search_task.cancel()
+            self.search_task = None
+        terms = parse_query(self.search_input.text())
+        if not terms:
+            self.last_terms, self.last_selection = [], None
+            self.model.set_selection(None)
+            self.update_count()
+            return
+        if self.search_index is None:
+            # set_search_index runs the search once the index is ready
+            self.update_count("Indexing...")
             return
         
-        filtered = [
-            item for item in raw_data
-            if any(str(value).lower().find(search_term) != -1 for value in item.values())
-        ]
-        
-        self.table.setRowCount(len(filtered))
-        for row, item in enumerate(filtered):
-            for col, col_name in enumerate(['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']):
-                value = item.get(col_name, '')
-                self.table.setItem(row, col, QTableWidgetItem(str(value)))
+        # A query that only adds to the last one searches within its results
+        within = None
+        if self.last_selection is not None and query_narrows(terms, self.last_terms):
+            within = self.last_selection
+        index = self.search_index
+        self.update_count("Searching...")
+        self.search_task = self.main_window.run_task(
+            lambda task: (terms, index.search(terms, within, task.check_cancelled)),
+            on_finished=self.show_results,
+        )
+    
+    def show_results(self, result):
+        if self.search_task is None or self.sender() is not self.search_task.signals:
+            # Superseded by a newer query
+            return
+        self.search_task = None
+        self.last_terms, self.last_selection = result
+        self.model.set_selection(self.last_selection)
+        self.update_count()
 
 
 class MainWindow(QMainWindow):
@@ -323,6 +1283,15 @@ class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.current_data = None
+        self.current_view = None
+        # Views are built on first use and kept, see switch_view
+        self.views = {}
+        # Network work runs here so the window never blocks on I/O
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(API_POOL_SIZE)
+        self.tasks = set()
+        self.upload_task = None
+        self.painted = False
         self.init_ui()
     
     def init_ui(self):
@@ -372,23 +1341,52 @@ class MainWindow(QMainWindow):
         sidebar.setLayout(sidebar_layout)
         
         # Content area
-        self.content_widget = QWidget()
-        self.content_layout = QVBoxLayout()
-        self.content_widget.setLayout(self.content_layout)
+        self.content_stack = QStackedWidget()
         
         main_layout.addWidget(sidebar)
-        main_layout.addWidget(self.content_widget, 1)
+        main_layout.addWidget(self.content_stack, 1)
         
         central_widget.setLayout(main_layout)
         
+        # Upload progress lives in the status bar so it stays visible in every view
+        self.upload_label = QLabel()
+        self.upload_progress = QProgressBar()
+        self.upload_progress.setMaximumWidth(250)
+        self.cancel_upload_btn = QPushButton("Cancel")
+        self.cancel_upload_btn.clicked.connect(self.cancel_upload)
+        for widget in (self.upload_label, self.upload_progress, self.cancel_upload_btn):
+            self.statusBar().addPermanentWidget(widget)
+            widget.hide()
+        
         # Set initial view
         self.switch_view('upload')
     
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.painted:
+            return
+        self.painted = True
+        startup.mark('first_paint')
+        # The window is up: load what the other views need in the background
+        self.run_task(
+            preload_modules,
+            on_finished=lambda _: self.finish_startup(),
+            on_failed=lambda error: self.finish_startup(),
+        )
+    
+    def finish_startup(self):
+        startup.mark('background_imports')
+        startup.report()
+    
     def switch_view(self, view_name):
-        # Clear current content
-        for i in reversed(range(self.content_layout.count())):
-            self.content_layout.itemAt(i).widget().setParent(None)
-        
+        widget = self.views.get(view_name)
+        if widget is None:
+            widget = self.views[view_name] = self.create_view(view_name)
+            self.content_stack.addWidget(widget)
+        self.content_stack.setCurrentWidget(widget)
+        self.current_view = view_name
+    
+    def create_view(self, view_name):
         if view_name == 'upload':
             widget = UploadWidget(self)
         elif view_name == 'dashboard':
@@ -407,21 +1405,113 @@ class MainWindow(QMainWindow):
             widget = HistoryWidget(self)
         else:
             widget = QLabel("Unknown view")
+        return widget
+    
+    def set_current_data(self, data, view_name=None):
+        """Show ``data`` from now on, dropping the views built for the previous dataset.
         
-        self.content_layout.addWidget(widget)
+        Then selects ``view_name``, by default the page already shown, which
+        is rebuilt for ``data`` rather than letting the stack fall through to
+        another page.
+        """
+        if data is not self.current_data:
+            self.current_data = data
+            for name in DATASET_VIEWS:
+                widget = self.views.pop(name, None)
+                if widget is not None:
+                    self.content_stack.removeWidget(widget)
+                    widget.deleteLater()
+        view_name = view_name or self.current_view
+        if view_name is not None:
+            self.switch_view(view_name)
     
     def switch_to_dashboard(self, data):
-        self.current_data = data
-        self.switch_view('dashboard')
+        self.statusBar().clearMessage()
+        self.set_current_data(data, 'dashboard')
     
     def refresh_history(self):
-        # This will be called after upload to refresh history if needed
-        pass
+        history = self.views.get('history')
+        if history is not None:
+            history.load_history()
+    
+    def show_error(self, message):
+        self.statusBar().clearMessage()
+        QMessageBox.warning(self, "Error", message)
+    
+    def run_task(self, func, *args, on_finished=None, on_failed=None, on_cancelled=None):
+        """Run ``func(task, *args)`` on the thread pool and return the ``Task``."""
+        task = Task(func, *args)
+        for signal, slot in ((task.signals.finished, on_finished),
+                             (task.signals.failed, on_failed),
+                             (task.signals.cancelled, on_cancelled)):
+            if slot is not None:
+                signal.connect(slot)
+            # Keep the task referenced until its outcome reaches the GUI thread
+            signal.connect(lambda *_, task=task: self.tasks.discard(task))
+        self.tasks.add(task)
+        self.thread_pool.start(task)
+        return task
+    
+    def start_upload(self, file_path):
+        """Upload a CSV in the background; returns False if one is already running."""
+        if self.upload_task is not None:
+            return False
+        self.upload_task = self.run_task(
+            upload_csv, file_path,
+            on_finished=self.on_upload_finished,
+            on_failed=self.on_upload_failed,
+            on_cancelled=self.on_upload_cancelled,
+        )
+        self.upload_task.signals.progress.connect(self.on_upload_progress)
+        self.upload_label.setText(f"Uploading {os.path.basename(file_path)}")
+        self.upload_progress.setRange(0, 100)
+        self.upload_progress.setValue(0)
+        self.cancel_upload_btn.setEnabled(True)
+        for widget in (self.upload_label, self.upload_progress, self.cancel_upload_btn):
+            widget.show()
+        return True
+    
+    def cancel_upload(self):
+        if self.upload_task is not None:
+            self.upload_task.cancel()
+            self.cancel_upload_btn.setEnabled(False)
+            self.upload_label.setText("Cancelling...")
+    
+    def on_upload_progress(self, sent, total):
+        if sent < total:
+            self.upload_progress.setValue(int(sent * 100 / total))
+            self.upload_label.setText(f"Uploading {sent / 2**20:.1f} / {total / 2**20:.1f} MB")
+        else:
+            # Everything is sent; the server is now parsing the file
+            self.upload_progress.setRange(0, 0)
+            self.upload_label.setText("Processing on server...")
+    
+    def finish_upload(self, message):
+        self.upload_task = None
+        for widget in (self.upload_label, self.upload_progress, self.cancel_upload_btn):
+            widget.hide()
+        self.statusBar().showMessage(message, 10000)
+    
+    def on_upload_finished(self, data):
+        self.finish_upload(f"Upload successful! Processed {data.get('total_records', 0)} records.")
+        self.refresh_history()
+        if self.current_view == 'upload':
+            self.switch_to_dashboard(data)
+        else:
+            # Don't pull the user away from what they are doing
+            self.set_current_data(data)
+    
+    def on_upload_failed(self, error):
+        self.finish_upload(f"Upload failed: {error}")
+    
+    def on_upload_cancelled(self):
+        self.finish_upload("Upload cancelled.")
 
 
 def main():
     app = QApplication(sys.argv)
     window = MainWindow()
+    startup.mark('window')
     window.show()
     sys.exit(app.exec_())
 
@@ -0,0 +1,124 @@
+"""Tests for the data table search; run ``python -m unittest tests`` here."""
+import itertools
+import unittest
+
+import numpy as np
+
+from main import SearchIndex, parse_query, query_narrows
+
+
+def equipment_columns(rows=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    types = rng.choice(['Pump', 'Valve', 'Compressor', 'Heat Exchanger'], rows).astype(object)
+    columns = {
+        'Equipment Name': np.array([f'{eq_type[:4]}-{i}' for i, eq_type in enumerate(types)], dtype=object),
+        'Type': types,
+        'Flowrate': rng.integers(50, 250, rows).astype(float),
+        'Pressure': np.round(rng.uniform(2, 9, rows), 1),
+        'Temperature': np.round(rng.uniform(80, 140, rows), 1),
+    }
+    columns['Pressure'][::17] = np.nan
+    return columns
+
+
+class ParseQueryTests(unittest.TestCase):
+    def test_terms(self):
+        self.assertEqual(parse_query('  Pump  type:valve name=P-101 '), [
+            ('text', None, 'pump'),
+            ('text', 'Type', 'valve'),
+            ('equals', 'Equipment Name', 'p-101'),
+        ])
+        self.assertEqual(parse_query('flowrate>100 pressure<=5 temperature=90'), [
+            ('range', 'Flowrate', 100.0, np.inf, False, True),
+            ('range', 'Pressure', -np.inf, 5.0, True, True),
+            ('range', 'Temperature', 90.0, 90.0, True, True),
+        ])
+        self.assertEqual(parse_query('pressure:2..5 pressure:..5 pressure:2..'), [
+            ('range', 'Pressure', 2.0, 5.0, True, True),
+            ('range', 'Pressure', -np.inf, 5.0, True, True),
+            ('range', 'Pressure', 2.0, np.inf, True, True),
+        ])
+
+    def test_malformed_terms_are_text(self):
+        self.assertEqual(parse_query('flowrate>abc type>x colour:red pressure:a..b'), [
+            ('text', None, 'flowrate>abc'),
+            ('text', None, 'type>x'),
+            ('text', None, 'colour:red'),
+            ('text', 'Pressure', 'a..b'),
+        ])
+
+
+class QueryNarrowsTests(unittest.TestCase):
+    def assertNarrows(self, query, previous, expected=True):
+        self.assertEqual(query_narrows(parse_query(query), parse_query(previous)), expected,
+                         f'{query!r} after {previous!r}')
+
+    def test_narrowing_queries(self):
+        self.assertNarrows('pum', '')
+        self.assertNarrows('pump', 'pum')
+        self.assertNarrows('pump valve', 'pump')
+        self.assertNarrows('type:pump', 'type:pum')
+        self.assertNarrows('flowrate>100', 'flowrate>=100')
+        self.assertNarrows('flowrate>=150', 'flowrate>100')
+        self.assertNarrows('pressure:3..4', 'pressure:2..5')
+        self.assertNarrows('pressure=3', 'pressure:3..4')
+
+    def test_widening_queries(self):
+        self.assertNarrows('pum', 'pump', False)
+        self.assertNarrows('pump', 'pump valve', False)
+        self.assertNarrows('flowrate>=100', 'flowrate>100', False)
+        self.assertNarrows('pressure:2..5', 'pressure:3..4', False)
+        # A scoped term does not imply the same text in any column, nor the reverse
+        self.assertNarrows('type:pump', 'pump', False)
+        self.assertNarrows('pump', 'type:pump', False)
+
+
+class SearchIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.columns = equipment_columns()
+        self.index = SearchIndex(self.columns)
+
+    def expected(self, predicate):
+        rows = zip(*(self.columns[name] for name in self.index.names))
+        return np.array([predicate(dict(zip(self.index.names, row))) for row in rows])
+
+    def test_text_matches_any_column(self):
+        expected = self.expected(lambda row: any(
+            'ump' in (str(value) if isinstance(value, str) or not np.isnan(value) else '').lower()
+            for value in row.values()))
+        np.testing.assert_array_equal(self.index.search(parse_query('UMP')), expected)
+
+    def test_numbers_match_as_displayed(self):
+        expected = self.expected(lambda row: '.5' in ('' if np.isnan(row['Pressure']) else str(row['Pressure'])))
+        np.testing.assert_array_equal(self.index.search(parse_query('pressure:.5')), expected)
+        # Missing numbers show as empty cells, not as 'nan'
+        self.assertFalse(self.index.search(parse_query('pressure:nan')).any())
+
+    def test_scoped_and_range_terms(self):
+        expected = self.expected(lambda row: row['Type'] == 'Valve' and row['Flowrate'] > 100
+                                 and 3 <= row['Pressure'] <= 5)
+        selected = self.index.search(parse_query('type=valve flowrate>100 pressure:3..5'))
+        np.testing.assert_array_equal(selected, expected)
+        self.assertTrue(selected.any())
+
+    def test_search_within_narrowed_results(self):
+        queries = ['', 'p', 'pu', 'pump', 'pump flowrate>100', 'pump flowrate>150', 'va', 'valve',
+                   'type:heat', 'type:heat pressure:3..6', 'type:heat pressure:4..5', 'pressure<4']
+        narrowed = 0
+        for query, previous in itertools.permutations(queries, 2):
+            terms, previous_terms = parse_query(query), parse_query(previous)
+            if not query_narrows(terms, previous_terms):
+                continue
+            narrowed += 1
+            with self.subTest(query=query, previous=previous):
+                within = self.index.search(previous_terms)
+                np.testing.assert_array_equal(self.index.search(terms, within), self.index.search(terms))
+        self.assertGreater(narrowed, 20)
+
+    def test_empty_dataset(self):
+        index = SearchIndex({name: values[:0] for name, values in self.columns.items()})
+        self.assertEqual(len(index.search(parse_query('pump'))), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
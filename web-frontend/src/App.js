@@ -1,9 +1,10 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useMemo } from 'react';
 import './App.css';
 import UploadComponent from './components/UploadComponent';
 import Dashboard from './components/Dashboard';
 import DataTable from './components/DataTable';
 import HistoryPanel from './components/HistoryPanel';
+import { fetchUploadColumns, columnsToRecords } from './columnar';
 
 function App() {
   const [currentData, setCurrentData] = useState(null);
@@ -30,8 +31,29 @@ function App() {
     }
   };
 
-  const handleUploadSuccess = (data) => {
-    setCurrentData(data);
+  const tableRows = useMemo(
+    () => (currentData ? currentData.raw_data || columnsToRecords(currentData.columns) : []),
+    [currentData]
+  );
+
+  const loadUploadData = async (upload) => {
+    if (!upload.has_rows) {
+      return upload;
+    }
+    try {
+      return { ...upload, columns: await fetchUploadColumns(upload.id) };
+    } catch (error) {
+      console.error('Error fetching upload rows:', error);
+      return upload;
+    }
+  };
+
+  const handleSelectUpload = async (upload) => {
+    setCurrentData(await loadUploadData(upload));
+  };
+
+  const handleUploadSuccess = async (data) => {
+    setCurrentData(await loadUploadData(data));
     setActiveTab('dashboard');
     fetchHistory();
   };
@@ -77,10 +99,10 @@ function App() {
           <Dashboard data={currentData} />
         )}
         {activeTab === 'table' && currentData && (
-          <DataTable data={currentData.raw_data || []} />
+          <DataTable data={tableRows} />
         )}
         {activeTab === 'history' && (
-          <HistoryPanel history={history} onSelectUpload={setCurrentData} />
+          <HistoryPanel history={history} onSelectUpload={handleSelectUpload} />
         )}
       </main>
     </div>
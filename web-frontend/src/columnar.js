@@ -0,0 +1,55 @@
+const API_BASE_URL = 'http://localhost:8000/api';
+const AUTH_HEADER = 'Basic ' + btoa('admin:admin123');
+const NUMERIC_COLUMNS = ['Flowrate', 'Pressure', 'Temperature'];
+const PAGE_SIZE = 100000;
+
+// Download an upload's stored rows in the column-oriented JSON format.
+// Numeric columns come back as Float64Arrays (missing values become NaN).
+export const fetchUploadColumns = async (uploadId) => {
+  const parts = {};
+  let cursor = null;
+  do {
+    const params = new URLSearchParams({ format: 'columnar', limit: PAGE_SIZE });
+    if (cursor) {
+      params.set('cursor', cursor);
+    }
+    const response = await fetch(`${API_BASE_URL}/uploads/${uploadId}/rows/?${params}`, {
+      headers: {
+        'Authorization': AUTH_HEADER,
+      },
+    });
+    if (!response.ok) {
+      throw new Error(`Failed to load rows (${response.status})`);
+    }
+    const page = await response.json();
+    Object.entries(page.data).forEach(([name, values]) => {
+      (parts[name] = parts[name] || []).push(values);
+    });
+    cursor = page.next_cursor;
+  } while (cursor);
+
+  const columns = {};
+  Object.entries(parts).forEach(([name, pages]) => {
+    const values = pages.flat();
+    columns[name] = NUMERIC_COLUMNS.includes(name)
+      ? Float64Array.from(values, (value) => (value === null ? NaN : value))
+      : values;
+  });
+  return columns;
+};
+
+// Row objects for components that still work record by record.
+export const columnsToRecords = (columns) => {
+  if (!columns) return [];
+  const names = Object.keys(columns);
+  const length = names.length ? columns[names[0]].length : 0;
+  const records = new Array(length);
+  for (let i = 0; i < length; i++) {
+    const record = {};
+    names.forEach((name) => {
+      record[name] = columns[name][i];
+    });
+    records[i] = record;
+  }
+  return records;
+};
@@ -13,6 +13,22 @@ import {
 import { Bar, Scatter } from 'react-chartjs-2';
 import './Dashboard.css';
 
+const PARAMETERS = ['Flowrate', 'Pressure', 'Temperature'];
+const STAT_LABELS = [
+  ['count', 'Count'],
+  ['mean', 'Mean'],
+  ['min', 'Min'],
+  ['max', 'Max'],
+  ['std', 'Std'],
+  ['median', 'Median'],
+  ['p95', 'P95'],
+];
+
+const formatStat = value => {
+  if (value === null || value === undefined) return '-';
+  return Number.isInteger(value) ? value : value.toFixed(2);
+};
+
 ChartJS.register(
   CategoryScale,
   LinearScale,
@@ -57,15 +73,24 @@ const Dashboard = ({ data }) => {
   };
 
   // Flowrate vs Pressure Scatter Plot
-  const rawData = data.raw_data || [];
+  let scatterPoints;
+  if (data.columns) {
+    const { Pressure: pressures, Flowrate: flowrates } = data.columns;
+    scatterPoints = Array.from(pressures, (pressure, i) => ({
+      x: pressure,
+      y: flowrates[i],
+    }));
+  } else {
+    scatterPoints = (data.raw_data || []).map(item => ({
+      x: item.Pressure,
+      y: item.Flowrate,
+    }));
+  }
   const scatterData = {
     datasets: [
       {
         label: 'Flowrate vs Pressure',
-        data: rawData.map(item => ({
-          x: item.Pressure,
-          y: item.Flowrate,
-        })),
+        data: scatterPoints,
         backgroundColor: 'rgba(102, 126, 234, 0.6)',
         borderColor: 'rgba(102, 126, 234, 1)',
         pointRadius: 5,
@@ -139,6 +164,11 @@ const Dashboard = ({ data }) => {
     },
   };
 
+  const byType = (data.parameter_stats && data.parameter_stats.by_type) || {};
+  const typeStats = Object.entries(byType).flatMap(([eqType, columns]) =>
+    PARAMETERS.map(parameter => [eqType, parameter, columns[parameter]])
+  );
+
   return (
     <div className="dashboard">
       <div className="stats-summary">
@@ -167,6 +197,31 @@ const Dashboard = ({ data }) => {
           <Scatter data={scatterData} options={scatterOptions} />
         </div>
       </div>
+      {typeStats.length > 0 && (
+        <div className="type-stats">
+          <h3>Statistics by Equipment Type</h3>
+          <table>
+            <thead>
+              <tr>
+                <th>Type</th>
+                <th>Parameter</th>
+                {STAT_LABELS.map(([, label]) => <th key={label}>{label}</th>)}
+              </tr>
+            </thead>
+            <tbody>
+              {typeStats.map(([eqType, parameter, values]) => (
+                <tr key={`${eqType}-${parameter}`}>
+                  <td>{eqType}</td>
+                  <td>{parameter}</td>
+                  {STAT_LABELS.map(([stat]) => (
+                    <td key={stat}>{formatStat(values[stat])}</td>
+                  ))}
+                </tr>
+              ))}
+            </tbody>
+          </table>
+        </div>
+      )}
     </div>
   );
 };
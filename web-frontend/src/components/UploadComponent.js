@@ -47,7 +47,7 @@ const UploadComponent = ({ onUploadSuccess }) => {
     formData.append('file', file);
 
     try {
-      const response = await axios.post('http://localhost:8000/api/upload/', formData, {
+      const response = await axios.post('http://localhost:8000/api/upload/?raw_data=0', formData, {
         headers: {
           'Content-Type': 'multipart/form-data',
           'Authorization': 'Basic ' + btoa('admin:admin123'),